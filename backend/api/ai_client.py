@@ -0,0 +1,80 @@
+# backend/api/ai_client.py
+import importlib.util
+import threading
+
+import httpx
+from django.conf import settings
+
+
+# ====================================================
+# AI 解析サービス用の HTTP クライアント（プロセス内で使い回す）
+# ====================================================
+class AIServiceClient:
+    """
+    keep-alive / コネクションプール付きの httpx.Client
+
+    - connect / read タイムアウトを分離
+    - h2 が入っていれば HTTP/2
+    - 新規接続数を数えて再利用率を出せる
+    """
+
+    def __init__(self):
+        self.http2 = settings.AI_HTTP2 and importlib.util.find_spec("h2") is not None
+        self.client = httpx.Client(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=settings.AI_HTTP_POOL_SIZE,
+                max_keepalive_connections=settings.AI_HTTP_KEEPALIVE,
+                keepalive_expiry=settings.AI_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                settings.AI_IMAGE_ANALYSIS_TIMEOUT,
+                connect=settings.AI_IMAGE_ANALYSIS_CONNECT_TIMEOUT,
+            ),
+        )
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def _trace(self, event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        with self._lock:
+            self.requests += 1
+        return self.client.post(url, extensions={"trace": self._trace}, **kwargs)
+
+    def stats(self) -> dict:
+        pool = getattr(self.client._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+
+        with self._lock:
+            requests = self.requests
+            new_connections = self.new_connections
+
+        return {
+            "http2": self.http2,
+            "pool_size": settings.AI_HTTP_POOL_SIZE,
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "requests": requests,
+            "new_connections": new_connections,
+            "reuse_rate": (
+                round(1 - new_connections / requests, 3) if requests else None
+            ),
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_ai_client() -> AIServiceClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AIServiceClient()
+    return _client
@@ -0,0 +1,162 @@
+# backend/api/authentication.py
+import hashlib
+import logging
+import time
+
+import jwt
+from django.conf import settings
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+
+from .caches import TTLCache
+from .supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+# 検証済みトークン（sha256 → payload）。exp で自動失効
+verified_token_cache = TTLCache(maxsize=settings.SUPABASE_AUTH_CACHE_SIZE)
+
+_jwks_client = None
+
+# 受け付ける署名アルゴリズム（none などは JWKS を取りに行く前に弾く）
+JWKS_ALGORITHMS = ("RS256", "ES256")
+ALLOWED_ALGORITHMS = ("HS256", *JWKS_ALGORITHMS)
+
+
+# ====================================================
+# Supabase ユーザー（request.user に入る）
+# ====================================================
+class SupabaseUser:
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+        self.id = payload.get("sub")
+        self.email = payload.get("email")
+
+    def __str__(self):
+        return str(self.id)
+
+
+def get_jwks_client():
+    global _jwks_client
+    if _jwks_client is None:
+        _jwks_client = jwt.PyJWKClient(
+            f"{settings.SUPABASE_URL}/auth/v1/.well-known/jwks.json",
+            cache_keys=True,
+        )
+    return _jwks_client
+
+
+def _decode_remote(token: str) -> dict:
+    """
+    JWT secret 未設定時のフォールバック（Supabase Auth に問い合わせ）
+    """
+    user = supabase.auth.get_user(token)
+    if not user or not user.user:
+        raise jwt.InvalidTokenError("user not found")
+
+    claims = jwt.decode(token, options={"verify_signature": False})
+    claims["sub"] = user.user.id
+    return claims
+
+
+# ====================================================
+# トークン検証（ローカル検証 + 検証済みキャッシュ）
+# ====================================================
+def decode_supabase_token(token: str) -> dict:
+    """
+    Supabase の access token を検証して payload を返す
+
+    - HS256: SUPABASE_JWT_SECRET でローカル検証
+    - RS256 / ES256: JWKS（鍵はキャッシュ）でローカル検証
+    - 検証済みトークンは exp まで LRU に保持
+
+    不正なトークンは jwt.InvalidTokenError を送出する
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = verified_token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    alg = jwt.get_unverified_header(token).get("alg")
+    if alg not in ALLOWED_ALGORITHMS:
+        raise jwt.InvalidAlgorithmError(f"unsupported alg: {alg}")
+
+    options = {"require": ["exp", "sub"]}
+    audience = settings.SUPABASE_JWT_AUDIENCE or None
+
+    if alg == "HS256":
+        if settings.SUPABASE_JWT_SECRET:
+            payload = jwt.decode(
+                token,
+                settings.SUPABASE_JWT_SECRET,
+                algorithms=["HS256"],
+                audience=audience,
+                options=options,
+            )
+        else:
+            payload = _decode_remote(token)
+    else:
+        signing_key = get_jwks_client().get_signing_key_from_jwt(token)
+        payload = jwt.decode(
+            token,
+            signing_key.key,
+            algorithms=list(JWKS_ALGORITHMS),
+            audience=audience,
+            options=options,
+        )
+
+    exp = payload.get("exp")
+    if exp and exp > time.time():
+        verified_token_cache.set(key, payload, expires_at=exp)
+
+    return payload
+
+
+# ====================================================
+# DRF 認証クラス
+# ====================================================
+class SupabaseJWTAuthentication(BaseAuthentication):
+    """
+    Authorization: Bearer <token> を検証して request.user に SupabaseUser を入れる
+
+    ヘッダーが無い場合は None（未認証）を返し、各 view 側で 401 を返す
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith(f"{self.keyword} "):
+            return None
+
+        token = auth_header.split(" ")[1]
+        try:
+            payload = decode_supabase_token(token)
+        except jwt.InvalidTokenError as e:
+            raise AuthenticationFailed("Invalid token") from e
+        except Exception as e:
+            logger.warning(f"token verification failed: {e}")
+            raise AuthenticationFailed("Invalid token") from e
+
+        return SupabaseUser(payload), token
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+# ==========================
+# request → user_id 抽出共通処理
+# ==========================
+def get_user_id_from_request(request):
+    user = getattr(request, "user", None)
+    if not user or not user.is_authenticated:
+        return None, Response(
+            {"status": "error", "message": "Authorization header missing"},
+            status=401
+        )
+
+    return user.id, None
@@ -0,0 +1,175 @@
+# backend/api/caches.py
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+
+# ====================================================
+# TTL 付き LRU キャッシュ（プロセス内）
+# ====================================================
+class TTLCache:
+    """
+    スレッドセーフな LRU キャッシュ
+
+    - maxsize を超えたら最も古く使われたエントリから追い出す
+    - エントリごとに有効期限（epoch 秒）を持てる
+    - maxbytes + getsizeof を指定するとメモリ量でも追い出す
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float | None = None,
+        maxbytes: int | None = None,
+        getsizeof=None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.getsizeof = getsizeof
+        self.currbytes = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._pop(key)
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, expires_at: float | None = None):
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (value, expires_at)
+            self.currbytes += self._sizeof(value)
+            while len(self._data) > self.maxsize or (
+                self.maxbytes is not None
+                and self.currbytes > self.maxbytes
+                and len(self._data) > 1
+            ):
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.currbytes = 0
+
+    def _sizeof(self, value) -> int:
+        return self.getsizeof(value) if self.getsizeof else 0
+
+    def _pop(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.currbytes -= self._sizeof(entry[0])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "bytes": self.currbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+# ====================================================
+# 差し替え可能なキャッシュバックエンド
+# ====================================================
+class LocalCacheBackend:
+    """
+    プロセス内 LRU（件数 + メモリ量で上限）
+    """
+
+    def __init__(self, maxsize: int, maxbytes: int | None = None, getsizeof=None):
+        self.cache = TTLCache(
+            maxsize=maxsize,
+            maxbytes=maxbytes,
+            getsizeof=getsizeof or sys.getsizeof,
+        )
+
+    def get(self, key: str):
+        return self.cache.get(key)
+
+    def set(self, key: str, value, timeout: float):
+        self.cache.set(key, value, expires_at=time.time() + timeout)
+
+    def delete(self, key: str):
+        self.cache.delete(key)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+class DjangoCacheBackend:
+    """
+    Django cache framework（redis / memcached / DB にすると worker 間で共有できる）
+    """
+
+    def __init__(self, alias: str):
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key: str):
+        value = self.cache.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value, timeout: float):
+        self.cache.set(key, value, timeout=int(timeout))
+
+    def delete(self, key: str):
+        self.cache.delete(key)
+
+    def stats(self) -> dict:
+        return {"alias": self.alias, "hits": self.hits, "misses": self.misses}
+
+
+def build_cache_backend(
+    backend: str,
+    alias: str,
+    maxsize: int,
+    maxbytes: int | None = None,
+    getsizeof=None,
+):
+    """
+    backend: "local" / "django"
+    getsizeof: local のメモリ量計算（省略時は sys.getsizeof）
+    """
+    if backend == "django":
+        return DjangoCacheBackend(alias)
+    return LocalCacheBackend(maxsize=maxsize, maxbytes=maxbytes, getsizeof=getsizeof)
@@ -0,0 +1,339 @@
+# backend/api/declutter_rules.py
+import copy
+from datetime import date
+
+import numpy as np
+
+
+# ====================================================
+# 断捨離スコアのルール表
+# ====================================================
+# group ごとに bands を上から順に評価し、最初に当たった 1 つだけを加点する
+# （従来の if / elif と同じ）
+#
+# op:
+#   gte         column >= threshold
+#   lt          column <  threshold
+#   off_season  season_tag があり、今の季節を含まない
+#
+# null_band: null_column が NULL の行はこちらを適用（bands は見ない）
+DECLUTTER_RULES = {
+    "groups": [
+        {
+            "name": "age",
+            "column": "days_since_created",
+            "op": "gte",
+            "bands": [
+                {"key": "1y", "threshold": 365, "point": 3,
+                 "reason": "登録から1年以上経過しています"},
+                {"key": "6m", "threshold": 180, "point": 2,
+                 "reason": "登録から半年以上経過しています"},
+                {"key": "3m", "threshold": 90, "point": 1,
+                 "reason": "登録から3ヶ月以上経過しています"},
+            ],
+        },
+        {
+            "name": "last_use",
+            "column": "days_since_last_use",
+            "op": "gte",
+            "null_column": "last_used_date",
+            "null_band": {"key": "never", "point": 4,
+                          "reason": "一度も使用されていません"},
+            "bands": [
+                {"key": "1y", "threshold": 365, "point": 5,
+                 "reason": "1年以上使用されていません"},
+                {"key": "6m", "threshold": 180, "point": 3,
+                 "reason": "半年以上使用されていません"},
+                {"key": "3m", "threshold": 90, "point": 1,
+                 "reason": "3ヶ月以上使用されていません"},
+            ],
+        },
+        {
+            "name": "usage_rate",
+            "column": "monthly_usage_rate",
+            "op": "lt",
+            "bands": [
+                {"key": "rare", "threshold": 0.2, "point": 3,
+                 "reason": "ほとんど使用されていません"},
+                {"key": "low", "threshold": 0.5, "point": 2,
+                 "reason": "使用頻度が低いです"},
+                {"key": "occasional", "threshold": 1, "point": 1,
+                 "reason": "たまにしか使用されていません"},
+            ],
+        },
+        {
+            "name": "season",
+            "column": "season_tag",
+            "op": "off_season",
+            "bands": [
+                {"key": "off_season", "point": -2,
+                 "reason": "季節外のため、判断を保留します"},
+            ],
+        },
+    ],
+    # 上から順に min_score 以上なら該当 tier、どれにも届かなければ候補外
+    "tiers": [
+        {"key": "strong", "min_score": 9, "label": "強い断捨離候補"},
+        {"key": "review", "min_score": 7, "label": "見直し候補"},
+    ],
+}
+
+# 上書きできる項目（文言や評価方法は変えられない）
+OVERRIDABLE_BAND_FIELDS = ("threshold", "point")
+
+
+def get_current_season(today: date | None = None) -> str:
+    month = (today or date.today()).month
+    if month in (12, 1, 2):
+        return "冬"
+    elif month in (3, 4, 5):
+        return "春"
+    elif month in (6, 7, 8):
+        return "夏"
+    else:
+        return "秋"
+
+
+# ----------------------------------------------------
+# ルールの上書き
+# ----------------------------------------------------
+def apply_overrides(overrides: dict | None, rules: dict = DECLUTTER_RULES) -> dict:
+    """
+    既定のルール表に上書きを当てた新しいルール表を返す
+
+    overrides の形:
+        {
+            "age": {"1y": {"threshold": 730}, "3m": {"point": 0}},
+            "last_use": {"never": {"point": 5}},
+            "tiers": {"review": 6},
+        }
+
+    未知の group / band / 項目や数値以外は ValueError
+    """
+    merged = copy.deepcopy(rules)
+    if not overrides:
+        return merged
+    if not isinstance(overrides, dict):
+        raise ValueError("overrides must be an object")
+
+    groups = {g["name"]: g for g in merged["groups"]}
+    tiers = {t["key"]: t for t in merged["tiers"]}
+
+    for name, patch in overrides.items():
+        if name == "tiers":
+            if not isinstance(patch, dict):
+                raise ValueError("tiers must be an object")
+            for key, min_score in patch.items():
+                if key not in tiers:
+                    raise ValueError(f"unknown tier: {key}")
+                tiers[key]["min_score"] = _number(min_score, f"tiers.{key}")
+            continue
+
+        group = groups.get(name)
+        if group is None:
+            raise ValueError(f"unknown rule group: {name}")
+        if not isinstance(patch, dict):
+            raise ValueError(f"{name} must be an object")
+
+        bands = {b["key"]: b for b in group["bands"]}
+        if group.get("null_band"):
+            bands[group["null_band"]["key"]] = group["null_band"]
+
+        for key, fields in patch.items():
+            band = bands.get(key)
+            if band is None:
+                raise ValueError(f"unknown rule: {name}.{key}")
+            if not isinstance(fields, dict):
+                raise ValueError(f"{name}.{key} must be an object")
+            for field, value in fields.items():
+                if field not in OVERRIDABLE_BAND_FIELDS or field not in band:
+                    raise ValueError(f"{name}.{key}.{field} cannot be overridden")
+                band[field] = _number(value, f"{name}.{key}.{field}")
+
+    # 上から評価するので、しきい値の順序が崩れないよう並べ直す
+    for group in merged["groups"]:
+        if group["op"] in ("gte", "lt"):
+            group["bands"].sort(
+                key=lambda b: b["threshold"], reverse=group["op"] == "gte"
+            )
+    merged["tiers"].sort(key=lambda t: t["min_score"], reverse=True)
+
+    return merged
+
+
+def merge_overrides(base: dict | None, patch: dict | None) -> dict:
+    """
+    保存済みの上書き（base）にさらに上書き（patch）を重ねる（what-if 用）
+    band 単位で項目をマージし、同じ項目は patch が優先
+    形の検証は apply_overrides() に任せる
+    """
+    merged = copy.deepcopy(base or {})
+
+    for name, group_patch in (patch or {}).items():
+        current = merged.get(name)
+        if not isinstance(group_patch, dict) or not isinstance(current, dict):
+            merged[name] = copy.deepcopy(group_patch)
+            continue
+
+        for key, fields in group_patch.items():
+            if isinstance(fields, dict) and isinstance(current.get(key), dict):
+                current[key] = {**current[key], **fields}
+            else:
+                current[key] = copy.deepcopy(fields)
+
+    return merged
+
+
+def _number(value, label: str):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{label} must be a number")
+    return value
+
+
+# ----------------------------------------------------
+# 列ごとの評価（NumPy）
+# ----------------------------------------------------
+class ScoringFrame:
+    """
+    スコア計算に使う列を一度だけ配列にしておく
+    同じ行に対してルール表を変えて何度でも score() できる（what-if 用）
+    """
+
+    def __init__(self, rows: list[dict], today: date | None = None):
+        self.rows = rows
+        self.season = get_current_season(today)
+        self._columns: dict[str, np.ndarray] = {}
+
+        self.is_favorite = np.fromiter(
+            (bool(row.get("is_favorite")) for row in rows), dtype=bool, count=len(rows)
+        )
+
+    def numeric(self, column: str) -> np.ndarray:
+        # None は NaN（どの比較にも当たらない）
+        if column not in self._columns:
+            self._columns[column] = np.array(
+                [row.get(column) for row in self.rows], dtype=float
+            ).reshape(len(self.rows))
+        return self._columns[column]
+
+    def is_null(self, column: str) -> np.ndarray:
+        key = f"{column}:null"
+        if key not in self._columns:
+            self._columns[key] = np.fromiter(
+                (row.get(column) is None for row in self.rows),
+                dtype=bool, count=len(self.rows),
+            )
+        return self._columns[key]
+
+    def off_season(self, column: str) -> np.ndarray:
+        key = f"{column}:off_season"
+        if key not in self._columns:
+            self._columns[key] = np.fromiter(
+                (bool(tags) and self.season not in tags
+                 for tags in (row.get(column) for row in self.rows)),
+                dtype=bool, count=len(self.rows),
+            )
+        return self._columns[key]
+
+    def _band_conditions(self, group: dict) -> list[tuple[dict, np.ndarray]]:
+        op = group["op"]
+        conditions = []
+
+        if group.get("null_band"):
+            is_null = self.is_null(group["null_column"])
+            conditions.append((group["null_band"], is_null))
+            not_null = ~is_null
+        else:
+            not_null = np.ones(len(self.rows), dtype=bool)
+
+        if op == "off_season":
+            mask = self.off_season(group["column"]) & not_null
+            conditions.extend((band, mask) for band in group["bands"])
+            return conditions
+
+        values = self.numeric(group["column"])
+        with np.errstate(invalid="ignore"):
+            for band in group["bands"]:
+                if op == "gte":
+                    hit = values >= band["threshold"]
+                elif op == "lt":
+                    hit = values < band["threshold"]
+                else:
+                    raise ValueError(f"unknown op: {op}")
+                conditions.append((band, hit & not_null))
+        return conditions
+
+    def score(self, rules: dict = DECLUTTER_RULES) -> list[dict]:
+        """
+        ルール表で全行を採点し、tier に届いた行だけを元の順序で返す
+        （お気に入りは常に除外）
+
+        NumPy では「group ごとに当たった band の組み合わせ」を 1 つの整数にするだけ。
+        点数・tier・score_breakdown は組み合わせごとに 1 回だけ作り、
+        候補行にはそれを当てはめる（score_breakdown の要素は行の間で共有）
+        """
+        n = len(self.rows)
+        if n == 0:
+            return []
+
+        combo = np.zeros(n, dtype=np.int64)
+        # (band の一覧, 桁の重み)。当たり無しは 0、bands[i] は i + 1
+        digits = []
+        weight = 1
+
+        for group in rules["groups"]:
+            conditions = self._band_conditions(group)
+            bands = [band for band, _ in conditions]
+            index = np.select(
+                [hit for _, hit in conditions],
+                np.arange(1, len(bands) + 1),
+                default=0,
+            )
+            combo += index * weight
+            digits.append((bands, weight))
+            weight *= len(bands) + 1
+
+        templates = {}
+        is_candidate = np.zeros(weight, dtype=bool)
+        for key in np.unique(combo).tolist():
+            breakdown = []
+            for bands, w in digits:
+                hit = key // w % (len(bands) + 1)
+                if hit:
+                    band = bands[hit - 1]
+                    breakdown.append({"reason": band["reason"], "point": band["point"]})
+
+            score = sum(entry["point"] for entry in breakdown)
+            tier = next((t for t in rules["tiers"] if score >= t["min_score"]), None)
+            if tier is not None:
+                templates[key] = (score, tier, breakdown)
+                is_candidate[key] = True
+
+        selected = np.flatnonzero(is_candidate[combo] & ~self.is_favorite)
+
+        results = []
+        for i, key in zip(selected.tolist(), combo[selected].tolist()):
+            row = self.rows[i]
+            score, tier, breakdown = templates[key]
+            results.append({
+                "item_id": row["item_id"],
+                "name": row["name"],
+                "declutter_score": score,
+                "tier": tier["key"],
+                "tier_label": tier["label"],
+                "score_breakdown": list(breakdown),
+                "stats": {
+                    "usage_count": row["usage_count"],
+                    "last_used_date": row["last_used_date"],
+                    "days_since_created": row["days_since_created"],
+                    "days_since_last_use": row["days_since_last_use"],
+                    "monthly_usage_rate": row["monthly_usage_rate"],
+                },
+            })
+
+        return results
+
+
+def score_rows(rows: list[dict], rules: dict = DECLUTTER_RULES,
+               today: date | None = None) -> list[dict]:
+    return ScoringFrame(rows, today).score(rules)
@@ -0,0 +1,50 @@
+# backend/api/etag.py
+import hashlib
+import json
+
+from rest_framework.response import Response
+
+
+# ====================================================
+# ETag / If-None-Match による条件付きレスポンス
+# ====================================================
+def compute_etag(data) -> str:
+    """
+    内容のダイジェストから strong ETag を作る
+    """
+    body = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'
+
+
+def with_etag(data) -> dict:
+    """
+    キャッシュに入れる前に ETag を計算しておく（ヒット時に再計算しない）
+    """
+    return {"data": data, "etag": compute_etag(data)}
+
+
+def etag_matches(request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [tag.strip() for tag in header.split(",")]
+
+
+def conditional_response(request, payload, etag: str, headers: dict | None = None):
+    """
+    If-None-Match が一致すれば 304（本文なし）、違えば payload を返す
+    どちらも ETag を付け、既定ではブラウザに毎回再検証させる
+    （headers で Cache-Control を渡せば上書きできる）
+    """
+    headers = {
+        "Cache-Control": "private, no-cache",
+        **(headers or {}),
+        "ETag": etag,
+    }
+
+    if etag_matches(request, etag):
+        return Response(status=304, headers=headers)
+
+    return Response(payload, headers=headers)
@@ -0,0 +1,248 @@
+# backend/api/image_renditions.py
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .caches import TTLCache
+from .supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+BUCKET = "item_image"
+
+# サイズ名 → 長辺の最大ピクセル
+RENDITION_SIZES = {
+    "thumb": 200,
+    "card": 480,
+    "full": 1280,
+}
+
+# 拡張子 → (Pillow フォーマット, content-type, quality)
+RENDITION_FORMATS = {
+    "webp": ("WEBP", "image/webp", 80),
+    "jpg": ("JPEG", "image/jpeg", 82),
+}
+
+DEFAULT_FORMAT = "webp"
+
+# リサイズ版の状態（supabase/migrations/*_image_renditions.sql）
+STATE_TABLE = "image_renditions"
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+# ready / failed はそれ以上変わらないのでプロセス内に覚えておく
+# （pending の画像は作成済みになるまで毎回問い合わせる）
+final_status_cache = TTLCache(
+    maxsize=settings.SIGNED_URL_CACHE_SIZE,
+    ttl=settings.RENDITION_STATUS_CACHE_TTL,
+)
+
+
+# ====================================================
+# パス
+# ====================================================
+def rendition_path(file_path: str, size: str, fmt: str = DEFAULT_FORMAT) -> str:
+    """
+    item/<uuid>.png → item/<uuid>_thumb.webp
+    """
+    base = file_path.rsplit(".", 1)[0]
+    return f"{base}_{size}.{fmt}"
+
+
+def all_rendition_paths(file_path: str) -> list[str]:
+    return [
+        rendition_path(file_path, size, fmt)
+        for size in RENDITION_SIZES
+        for fmt in RENDITION_FORMATS
+    ]
+
+
+def resolve_image_path(file_path: str, size: str | None, fmt: str | None = None) -> str:
+    """
+    size 指定があればリサイズ版のパス、無ければ元画像のパスを返す
+    """
+    if size not in RENDITION_SIZES:
+        return file_path
+    if fmt not in RENDITION_FORMATS:
+        fmt = DEFAULT_FORMAT
+    return rendition_path(file_path, size, fmt)
+
+
+# ====================================================
+# 状態（作成待ちの登録 / 作成済みの記録）
+# ====================================================
+def enqueue_renditions(file_paths: list[str]):
+    """
+    リサイズ版の作成待ちに積む（作るのは process_renditions コマンド）
+    既に行がある（同じ内容の画像で ready など）パスはそのまま
+    """
+    if not file_paths:
+        return
+    supabase.table(STATE_TABLE).upsert(
+        [{"file_path": path, "status": PENDING} for path in dict.fromkeys(file_paths)],
+        on_conflict="file_path",
+        ignore_duplicates=True,
+    ).execute()
+
+
+def ready_renditions(file_paths: list[str]) -> set[str]:
+    """
+    リサイズ版が作成済み（ready）の元画像パス
+    状態を取得できない場合は空（= 元画像で表示）
+    """
+    ready, unknown = set(), []
+    for path in dict.fromkeys(file_paths):
+        status = final_status_cache.get(path)
+        if status == READY:
+            ready.add(path)
+        elif status is None:
+            unknown.append(path)
+
+    if not unknown:
+        return ready
+
+    try:
+        res = (
+            supabase.table(STATE_TABLE)
+            .select("file_path, status")
+            .in_("file_path", unknown)
+            .execute()
+        )
+    except Exception as e:
+        logger.warning(f"rendition status fetch failed: {e}")
+        return ready
+
+    for row in res.data or []:
+        if row["status"] in (READY, FAILED):
+            final_status_cache.set(row["file_path"], row["status"])
+        if row["status"] == READY:
+            ready.add(row["file_path"])
+    return ready
+
+
+def set_rendition_status(file_path: str, status: str, error: str | None = None):
+    supabase.table(STATE_TABLE).upsert({
+        "file_path": file_path,
+        "status": status,
+        "last_error": error,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }, on_conflict="file_path").execute()
+
+
+def delete_rendition_status(file_path: str):
+    final_status_cache.delete(file_path)
+    supabase.table(STATE_TABLE).delete().eq("file_path", file_path).execute()
+
+
+# ====================================================
+# 生成
+# ====================================================
+def open_normalized(data: bytes) -> Image.Image:
+    """
+    EXIF の回転を反映した RGB 画像を返す（メタデータは引き継がない）
+    """
+    with Image.open(io.BytesIO(data)) as src:
+        image = ImageOps.exif_transpose(src)
+        return image.convert("RGB")
+
+
+def downscale_jpeg(data: bytes, max_edge: int, quality: int) -> bytes:
+    """
+    長辺 max_edge 以下に縮小し、JPEG で再エンコードする
+    """
+    image = open_normalized(data)
+    image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+    buf = io.BytesIO()
+    image.save(buf, "JPEG", quality=quality, optimize=True)
+    return buf.getvalue()
+
+
+def build_renditions(data: bytes) -> list[tuple[str, str, bytes]]:
+    """
+    元画像の bytes から (size, fmt, bytes) の一覧を作る
+    EXIF の回転を反映し、メタデータは落とす
+    """
+    image = open_normalized(data)
+
+    renditions = []
+    for size, max_edge in RENDITION_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+        for fmt, (pil_format, _, quality) in RENDITION_FORMATS.items():
+            buf = io.BytesIO()
+            resized.save(buf, pil_format, quality=quality, optimize=True)
+            renditions.append((size, fmt, buf.getvalue()))
+
+    return renditions
+
+
+def upload_renditions(file_path: str, data: bytes) -> list[str]:
+    """
+    元画像の隣にリサイズ版をアップロードする
+    画像として開けない場合（HEIC など）は何もしない
+    """
+    try:
+        renditions = build_renditions(data)
+    except (UnidentifiedImageError, OSError) as e:
+        logger.warning(f"rendition build skipped: {e}")
+        return []
+
+    def upload(rendition):
+        size, fmt, body = rendition
+        path = rendition_path(file_path, size, fmt)
+        supabase.storage.from_(BUCKET).upload(
+            path,
+            body,
+            {"content-type": RENDITION_FORMATS[fmt][1], "upsert": "true"},
+        )
+        return path
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(renditions)) as executor:
+            paths = list(executor.map(upload, renditions))
+        set_rendition_status(file_path, READY)
+        return paths
+    except Exception as e:
+        # リサイズ版が無くても元画像で表示できるので失敗扱いにしない
+        logger.warning(f"rendition upload failed: {e}")
+        return []
+
+
+# ====================================================
+# 作成待ちの処理（web の worker ではなく process_renditions コマンドから呼ぶ）
+# ====================================================
+def claim_jobs(limit: int, stale_seconds: int) -> list[dict]:
+    res = supabase.rpc("claim_rendition_jobs", {
+        "p_limit": limit,
+        "p_stale_seconds": stale_seconds,
+    }).execute()
+    return res.data or []
+
+
+def process_job(job: dict, max_attempts: int) -> str:
+    """
+    storage 上の元画像を読み込んでリサイズ版を作り、状態を更新する
+    失敗したら max_attempts 回までは pending に戻す
+    戻り値: 更新後の status
+    """
+    file_path = job["file_path"]
+    try:
+        data = supabase.storage.from_(BUCKET).download(file_path)
+        paths = upload_renditions(file_path, data)
+        error = None if paths else "rendition build failed"
+    except Exception as e:
+        paths, error = [], str(e)
+
+    if paths:
+        return READY
+
+    status = FAILED if job.get("attempts", 0) >= max_attempts else PENDING
+    set_rendition_status(file_path, status, error)
+    return status
@@ -0,0 +1,181 @@
+# backend/api/management/commands/bench_declutter_scoring.py
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...declutter_rules import ScoringFrame, apply_overrides, get_current_season
+
+
+# ====================================================
+# 断捨離スコアのベンチマーク（DB には接続しない）
+# ====================================================
+# python manage.py bench_declutter_scoring --items 10000 50000 --repeat 5
+#
+# ダミーの行を作り、ルール表（NumPy）での採点時間を
+# 置き換え前の 1 行ずつのループと比較する。結果が一致しなければエラー
+#
+# 時間はすべて端から端まで（ScoringFrame の列変換を含む）
+#   rules ms    ScoringFrame(rows).score(rules)
+#   what-if ms  列変換 1 回 + baseline + シナリオ --scenarios 件の採点
+#               （旧ループはシナリオごとに全行を回すので legacy ms × (件数 + 1) と比べる）
+SEASONS = ["春", "夏", "秋", "冬"]
+
+
+def make_rows(n: int, seed: int) -> list[dict]:
+    rnd = random.Random(seed)
+    today = date.today()
+    rows = []
+    for i in range(n):
+        dsc = rnd.randint(90, 1500)
+        used = rnd.random() > 0.25
+        dslu = rnd.randint(0, dsc) if used else None
+        rows.append({
+            "item_id": i + 1,
+            "name": f"item {i + 1}",
+            "category": "tops",
+            "is_favorite": rnd.random() < 0.1,
+            "season_tag": rnd.sample(SEASONS, rnd.randint(0, 3)),
+            "usage_count": rnd.randint(1, 60) if used else 0,
+            "last_used_date": (today - timedelta(days=dslu)).isoformat() if used else None,
+            "days_since_created": dsc,
+            "days_since_last_use": dslu,
+            "monthly_usage_rate": round(rnd.random() * 3, 2) if used else 0,
+        })
+    return rows
+
+
+def legacy_score(rows: list[dict]) -> list[dict]:
+    """
+    置き換え前の declutter_candidates のループ（比較用）
+    """
+    current_season = get_current_season()
+    results = []
+
+    for row in rows:
+        if row["is_favorite"]:
+            continue
+
+        score = 0
+        score_breakdown = []
+
+        def add_score(reason: str, point: int):
+            nonlocal score
+            score += point
+            score_breakdown.append({"reason": reason, "point": point})
+
+        dsc = row["days_since_created"]
+        if dsc >= 365:
+            add_score("登録から1年以上経過しています", 3)
+        elif dsc >= 180:
+            add_score("登録から半年以上経過しています", 2)
+        elif dsc >= 90:
+            add_score("登録から3ヶ月以上経過しています", 1)
+
+        if row["last_used_date"] is None:
+            add_score("一度も使用されていません", 4)
+        else:
+            dslu = row["days_since_last_use"]
+            if dslu >= 365:
+                add_score("1年以上使用されていません", 5)
+            elif dslu >= 180:
+                add_score("半年以上使用されていません", 3)
+            elif dslu >= 90:
+                add_score("3ヶ月以上使用されていません", 1)
+
+        mur = row["monthly_usage_rate"]
+        if mur < 0.2:
+            add_score("ほとんど使用されていません", 3)
+        elif mur < 0.5:
+            add_score("使用頻度が低いです", 2)
+        elif mur < 1:
+            add_score("たまにしか使用されていません", 1)
+
+        item_seasons = row.get("season_tag", [])
+        if item_seasons and current_season:
+            if current_season not in item_seasons:
+                add_score("季節外のため、判断を保留します", -2)
+
+        if score >= 9:
+            tier, tier_label = "strong", "強い断捨離候補"
+        elif score >= 7:
+            tier, tier_label = "review", "見直し候補"
+        else:
+            continue
+
+        results.append({
+            "item_id": row["item_id"],
+            "name": row["name"],
+            "declutter_score": score,
+            "tier": tier,
+            "tier_label": tier_label,
+            "score_breakdown": score_breakdown,
+            "stats": {
+                "usage_count": row["usage_count"],
+                "last_used_date": row["last_used_date"],
+                "days_since_created": row["days_since_created"],
+                "days_since_last_use": row["days_since_last_use"],
+                "monthly_usage_rate": row["monthly_usage_rate"],
+            },
+        })
+
+    return results
+
+
+def best_of(repeat: int, fn) -> tuple[float, object]:
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = "断捨離スコア計算のベンチマーク（ルール表 vs 旧ループ）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000, 50000])
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--scenarios", type=int, default=10)
+
+    def handle(self, *args, items, repeat, seed, scenarios, **options):
+        rules = apply_overrides(None)
+        what_if = [
+            apply_overrides({"tiers": {"review": 6 + i % 3},
+                             "last_use": {"6m": {"threshold": 120 + i}}})
+            for i in range(scenarios)
+        ]
+
+        def run_what_if(rows):
+            frame = ScoringFrame(rows)
+            return [frame.score(r) for r in [rules, *what_if]]
+
+        self.stdout.write(
+            f"{'items':>8} {'legacy ms':>10} {'rules ms':>9} {'speedup':>8} "
+            f"{'legacy xN ms':>13} {'what-if ms':>11} {'speedup':>8} {'candidates':>10}"
+        )
+
+        for n in items:
+            rows = make_rows(n, seed)
+
+            legacy_time, expected = best_of(repeat, lambda: legacy_score(rows))
+            rules_time, actual = best_of(repeat, lambda: ScoringFrame(rows).score(rules))
+
+            if actual != expected:
+                raise CommandError(f"score mismatch at {n} items")
+
+            what_if_time, _ = best_of(repeat, lambda: run_what_if(rows))
+            legacy_what_if_time = legacy_time * (scenarios + 1)
+
+            self.stdout.write(
+                f"{n:>8} {legacy_time * 1000:>10.1f} {rules_time * 1000:>9.1f} "
+                f"{legacy_time / rules_time:>7.2f}x "
+                f"{legacy_what_if_time * 1000:>13.1f} {what_if_time * 1000:>11.1f} "
+                f"{legacy_what_if_time / what_if_time:>7.2f}x {len(actual):>10}"
+            )
+
+        self.stdout.write(self.style.SUCCESS("results match the legacy loop"))
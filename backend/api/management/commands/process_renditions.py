@@ -0,0 +1,71 @@
+# backend/api/management/commands/process_renditions.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...image_renditions import READY, claim_jobs, enqueue_renditions, process_job
+from ...signed_urls import storage_path
+from ...supabase_client import supabase
+
+
+# ====================================================
+# 作成待ちのリサイズ版を作る（web の worker とは別プロセス）
+# ====================================================
+# python manage.py process_renditions            溜まっている分を処理して終了（cron 用）
+# python manage.py process_renditions --watch    常駐して --interval 秒ごとに確認
+# python manage.py process_renditions --backfill 既存アイテムの画像（旧データ）も積んでから処理
+def enqueue_existing_images(page_size: int = 1000) -> int:
+    """
+    既存アイテムの画像（旧データ）を作成待ちに積む
+    状態の行が既にある画像は変えない。積もうとした画像の数を返す
+    """
+    count, offset = 0, 0
+    while True:
+        res = (
+            supabase.table("items")
+            .select("image_url")
+            .not_.is_("image_url", "null")
+            .order("item_id")
+            .range(offset, offset + page_size - 1)
+            .execute()
+        )
+        rows = res.data or []
+        enqueue_renditions([storage_path(row["image_url"]) for row in rows])
+        count += len(rows)
+
+        if len(rows) < page_size:
+            return count
+        offset += page_size
+
+
+class Command(BaseCommand):
+    help = "image_renditions の作成待ちを処理して thumb / card / full を作る"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--watch", action="store_true")
+        parser.add_argument("--backfill", action="store_true")
+        parser.add_argument("--interval", type=float, default=5)
+        parser.add_argument("--batch", type=int, default=10)
+        parser.add_argument("--max-attempts", type=int, default=3)
+        # building のまま止まったジョブを取り直すまでの秒数
+        parser.add_argument("--stale-seconds", type=int, default=600)
+
+    def handle(self, *args, watch, backfill, interval, batch, max_attempts,
+               stale_seconds, **options):
+        if backfill:
+            count = enqueue_existing_images()
+            self.stdout.write(f"queued {count} item images (existing rows kept)")
+
+        while True:
+            jobs = claim_jobs(batch, stale_seconds)
+
+            for job in jobs:
+                status = process_job(job, max_attempts)
+                style = self.style.SUCCESS if status == READY else self.style.WARNING
+                self.stdout.write(style(f"{job['file_path']}: {status}"))
+
+            if jobs:
+                continue
+            if not watch:
+                break
+            time.sleep(interval)
@@ -0,0 +1,23 @@
+# backend/api/management/commands/rebuild_usage_stats.py
+from django.core.management.base import BaseCommand
+
+from ...usage_stats import rebuild
+
+
+# ====================================================
+# item_usage_stats を usage_history から作り直す
+# ====================================================
+# python manage.py rebuild_usage_stats                 全ユーザー
+# python manage.py rebuild_usage_stats --user <uuid>   1 ユーザー分
+class Command(BaseCommand):
+    help = "usage_history から item_usage_stats を作り直す（バックフィル用）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", dest="user_id", default=None)
+
+    def handle(self, *args, user_id=None, **options):
+        count = rebuild(user_id)
+        target = user_id or "all users"
+        self.stdout.write(
+            self.style.SUCCESS(f"item_usage_stats rebuilt: {count} items ({target})")
+        )
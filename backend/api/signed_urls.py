@@ -0,0 +1,200 @@
+# backend/api/signed_urls.py
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .caches import build_cache_backend
+from .image_renditions import (
+    RENDITION_SIZES,
+    ready_renditions,
+    resolve_image_path,
+)
+from .supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKET = "item_image"
+
+# (bucket, file_path) → signed URL
+signed_url_cache = build_cache_backend(
+    settings.SIGNED_URL_CACHE_BACKEND,
+    alias=settings.SIGNED_URL_CACHE_ALIAS,
+    maxsize=settings.SIGNED_URL_CACHE_SIZE,
+    maxbytes=settings.SIGNED_URL_CACHE_MAX_BYTES,
+)
+
+
+def cache_key(bucket: str, file_path: str) -> str:
+    digest = hashlib.sha1(f"{bucket}:{file_path}".encode()).hexdigest()
+    return f"signed_url:{digest}"
+
+
+def cache_timeout(expires_in: int) -> float:
+    """
+    URL の有効期限の一定割合（SIGNED_URL_REFRESH_RATIO）でキャッシュを切らす
+    → 返す URL には常に残り寿命が十分ある
+    """
+    return expires_in * settings.SIGNED_URL_REFRESH_RATIO
+
+
+# ====================================================
+# 署名付き URL 生成（単体）
+# ====================================================
+def generate_signed_url(
+    file_path: str,
+    expires_in: int | None = None,
+    bucket: str = DEFAULT_BUCKET,
+):
+    expires_in = expires_in or settings.SIGNED_URL_EXPIRES_IN
+    key = cache_key(bucket, file_path)
+
+    cached = signed_url_cache.get(key)
+    if cached:
+        return cached
+
+    try:
+        res = supabase.storage.from_(bucket).create_signed_url(
+            file_path, expires_in
+        )
+        url = res.get("signedURL")
+    except Exception as e:
+        logger.warning(f"signed url generate failed: {e}")
+        return None
+
+    if url:
+        signed_url_cache.set(key, url, cache_timeout(expires_in))
+    return url
+
+
+# ====================================================
+# 署名付き URL 生成（一括）
+# ====================================================
+def _sign_chunk(
+    file_paths: list[str], expires_in: int, bucket: str
+) -> dict[str, str | None]:
+    """
+    1 チャンク分を一括署名（POST /object/sign/<bucket>）
+
+    storage3 の create_signed_urls は 1 件でも存在しないパスがあると
+    レスポンスの検証で例外になり、全件が失われる
+    → レスポンスを自前で読み、失敗した要素だけ None にする（1 件ずつの署名はしない）
+    """
+    storage = supabase.storage.from_(bucket)
+    try:
+        res = storage._request(
+            "POST",
+            ["object", "sign", storage.id],
+            json={"paths": file_paths, "expiresIn": str(expires_in)},
+        )
+        rows = res.json()
+    except Exception as e:
+        logger.warning(f"signed urls generate failed: {e}")
+        return {path: None for path in file_paths}
+
+    signed = {
+        row["path"]: storage._make_signed_url(row["signedURL"], {})["signedURL"]
+        for row in rows
+        if row.get("path") and row.get("signedURL") and not row.get("error")
+    }
+    return {path: signed.get(path) for path in file_paths}
+
+
+def generate_signed_urls(
+    file_paths: list[str],
+    expires_in: int | None = None,
+    bucket: str = DEFAULT_BUCKET,
+) -> dict[str, str | None]:
+    """
+    file_path → signed URL を返す
+    キャッシュに無いものだけをチャンク単位で一括署名し、チャンク同士は並列に実行する
+    """
+    expires_in = expires_in or settings.SIGNED_URL_EXPIRES_IN
+    file_paths = list(dict.fromkeys(file_paths))
+
+    result: dict[str, str | None] = {}
+    missing: list[str] = []
+    for path in file_paths:
+        cached = signed_url_cache.get(cache_key(bucket, path))
+        if cached:
+            result[path] = cached
+        else:
+            missing.append(path)
+
+    if not missing:
+        return result
+
+    chunk_size = settings.ITEM_IMAGE_SIGN_CHUNK_SIZE
+    chunks = [
+        missing[i:i + chunk_size]
+        for i in range(0, len(missing), chunk_size)
+    ]
+
+    if len(chunks) == 1:
+        result.update(_sign_chunk(chunks[0], expires_in, bucket))
+    else:
+        workers = min(settings.ITEM_IMAGE_SIGN_CONCURRENCY, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for signed in executor.map(
+                lambda chunk: _sign_chunk(chunk, expires_in, bucket), chunks
+            ):
+                result.update(signed)
+
+    timeout = cache_timeout(expires_in)
+    for path in missing:
+        if result.get(path):
+            signed_url_cache.set(cache_key(bucket, path), result[path], timeout)
+
+    return result
+
+
+# ====================================================
+# アイテム画像（image_url）→ 署名付き URL（一括）
+# ====================================================
+def storage_path(image_url: str) -> str:
+    """
+    public URL（旧データ）→ bucket 内の file_path
+    """
+    marker = f"/object/public/{DEFAULT_BUCKET}/"
+    if marker in image_url:
+        return image_url.split(marker)[-1]
+    return image_url
+
+
+def generate_image_urls(
+    image_urls: list[str],
+    size: str | None = None,
+    fmt: str | None = None,
+) -> dict[str, str | None]:
+    """
+    image_url → signed URL（size 指定時はリサイズ版）
+    リサイズ版を署名するのは作成済み（image_renditions が ready）の画像だけ
+    それ以外（旧データ・作成待ち・作れなかった画像）は元画像を署名する
+    """
+    file_paths = {url: storage_path(url) for url in dict.fromkeys(image_urls) if url}
+
+    ready = (
+        ready_renditions(list(file_paths.values()))
+        if size in RENDITION_SIZES else set()
+    )
+    targets = {
+        url: resolve_image_path(file_path, size, fmt) if file_path in ready else file_path
+        for url, file_path in file_paths.items()
+    }
+
+    signed_urls = generate_signed_urls(list(targets.values()))
+
+    # ready なのに署名できなかった（削除直後など）ものだけ元画像で署名し直す
+    fallback = [
+        file_paths[url]
+        for url, target in targets.items()
+        if not signed_urls.get(target) and target != file_paths[url]
+    ]
+    if fallback:
+        signed_urls.update(generate_signed_urls(fallback))
+
+    return {
+        url: signed_urls.get(target) or signed_urls.get(file_paths[url])
+        for url, target in targets.items()
+    }
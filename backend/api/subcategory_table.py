@@ -0,0 +1,101 @@
+# backend/api/subcategory_table.py
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+
+# ====================================================
+# subcategories の参照テーブル（プロセス内で共有）
+# ====================================================
+class SubcategoryTable:
+    """
+    subcategories はほぼ更新されないので、まとめて読み込んでメモリに持つ
+
+    - category ごとの一覧
+    - (category, name) → subcategory_id
+    - TTL（SUBCATEGORY_CACHE_TTL）経過後の参照で再読み込み
+    - 読み込みに失敗したら retry_after 秒は DB に取りに行かない
+      （読み込み済みなら古い表のまま返し、未読み込みなら例外）
+    """
+
+    def __init__(self, ttl: float, retry_after: float):
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._rows: list[dict] | None = None
+        self._by_category: dict[str, list[dict]] = {}
+        self._ids: dict[tuple[str, str], int] = {}
+        self.loaded_at = 0.0
+        self.failed_at: float | None = None
+        self.last_error: Exception | None = None
+
+    def reload(self):
+        res = supabase.table("subcategories").select("*").execute()
+        rows = res.data or []
+
+        by_category: dict[str, list[dict]] = {}
+        ids: dict[tuple[str, str], int] = {}
+        for row in rows:
+            by_category.setdefault(row["category"], []).append(row)
+            ids[(row["category"], row["name"])] = row["subcategory_id"]
+
+        with self._lock:
+            self._rows = rows
+            self._by_category = by_category
+            self._ids = ids
+            self.loaded_at = time.time()
+            self.failed_at = None
+            self.last_error = None
+
+    def _ensure_loaded(self):
+        now = time.time()
+        if self._rows is not None and now - self.loaded_at <= self.ttl:
+            return
+
+        # 直前に失敗している → しばらくは再試行しない
+        if self.failed_at is not None and now - self.failed_at < self.retry_after:
+            if self._rows is None:
+                raise RuntimeError(f"subcategories unavailable: {self.last_error}")
+            return
+
+        try:
+            self.reload()
+        except Exception as e:
+            with self._lock:
+                self.failed_at = now
+                self.last_error = e
+            if self._rows is None:
+                raise
+            logger.warning(f"subcategories reload failed (serving stale): {e}")
+
+    def all(self, category: str | None = None) -> list[dict]:
+        self._ensure_loaded()
+        if category:
+            return self._by_category.get(category, [])
+        return self._rows
+
+    def find_id(self, category: str | None, name: str | None) -> int | None:
+        """
+        (category, subcategory 名) → subcategory_id
+        読み込みに失敗した場合も None（呼び出し側の処理は止めない）
+        """
+        if not category or not name:
+            return None
+        try:
+            self._ensure_loaded()
+        except Exception as e:
+            logger.warning(f"subcategories load failed: {e}")
+            return None
+        return self._ids.get((category, name))
+
+
+subcategory_table = SubcategoryTable(
+    ttl=settings.SUBCATEGORY_CACHE_TTL,
+    retry_after=settings.SUBCATEGORY_RETRY_AFTER,
+)
@@ -1,7 +1,9 @@
 # backend/api/supabase_client.py
+import asyncio
 import os
+import weakref
 from dotenv import load_dotenv
-from supabase import create_client
+from supabase import AsyncClient, create_client
 
 # ===============================
 # .env を読み込む
@@ -20,4 +22,23 @@ SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")  # .env に合わせる
 # ===============================
 # Supabase クライアント生成
 # ===============================
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
\ No newline at end of file
+supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+# ===============================
+# async view 用クライアント（イベントループごと）
+# ===============================
+# httpx の AsyncClient の接続はイベントループに紐づくので、ループごとに作る
+# - ASGI（uvicorn）: ワーカーのループは 1 つ → 1 クライアントを使い回す
+# - WSGI / runserver: async view はリクエストごとの一時ループで動く
+#   → 毎回作り直しになる（動くが接続は使い回せない）
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_supabase() -> AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncClient(SUPABASE_URL, SUPABASE_KEY)
+        _async_clients[loop] = client
+    return client
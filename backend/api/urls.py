@@ -1,8 +1,12 @@
 # backend/api/urls.py
 from django.urls import path
 from .views.items import items_list_create, item_detail, discard_items, bulk_delete_items
-from .views.coordinations import coordinations_list_create, coordination_detail
-from .views.usage_history import usage_list_create, usage_detail, usage_by_date
+from .views.coordinations import (
+    coordinations_list_create,
+    coordination_detail,
+    coordinations_with_items,
+)
+from .views.usage_history import usage_list_create, usage_detail, usage_by_date, usage_by_range
 from .views.coordination_items import coordination_items_manage, get_all_coordination_items
 from .views.subcategories import subcategories_list
 from .views.storages import storages_list_create, storage_detail, storages_with_items
@@ -10,9 +14,22 @@ from .views.users import users_list_create, user_detail, user_update_email, user
 from .views.protected_view import protected_view
 from .views.items_image import item_image
 from .views.item_image_batch import item_image_batch
-from .views.declutter import declutter_candidates
-from .views.ai_image_analysis import ai_image_analysis_preview
-from .views.declutter_actions import update_declutter_status
+from .views.item_image_upload import item_image_upload_url
+from .views.declutter import (
+    declutter_candidates,
+    declutter_what_if,
+    declutter_rules,
+)
+from .views.ai_image_analysis import (
+    ai_image_analysis_preview,
+    ai_image_analysis_preview_batch,
+    ai_image_analysis_pool_stats,
+)
+from .views.cache_stats import cache_stats
+from .views.declutter_actions import (
+    update_declutter_status,
+    bulk_update_declutter_status,
+)
 
 urlpatterns = [
     # items
@@ -23,6 +40,7 @@ urlpatterns = [
 
     # coordinations
     path("coordinations/", coordinations_list_create),
+    path("coordinations/with_items/", coordinations_with_items),
     path("coordinations/<int:coordination_id>/", coordination_detail),
 
     # usage_history
@@ -52,11 +70,19 @@ urlpatterns = [
 
     # usage by date
     path("usage_history/date/<str:date_str>/", usage_by_date),
+    path("usage_history/range/", usage_by_range),
     path("items/<int:item_id>/image/", item_image),
+    path("items/image/upload-url/", item_image_upload_url),
     path("api/items/images/", item_image_batch),
     path("items/declutter_candidates/", declutter_candidates),
+    path("items/declutter_candidates/what_if/", declutter_what_if),
+    path("items/declutter/rules/", declutter_rules),
 
     # image analysis preview
     path("ai_image_analysis/preview/", ai_image_analysis_preview),
+    path("ai_image_analysis/preview/batch/", ai_image_analysis_preview_batch),
+    path("ai_image_analysis/pool_stats/", ai_image_analysis_pool_stats),
+    path("cache_stats/", cache_stats),
     path("items/declutter/action/", update_declutter_status),
+    path("items/declutter/action/bulk/", bulk_update_declutter_status),
 ]
\ No newline at end of file
@@ -0,0 +1,77 @@
+# backend/api/usage_stats.py
+from datetime import date
+
+from .supabase_client import supabase
+
+
+# ====================================================
+# アイテムごとの着用統計（item_usage_stats）
+# ====================================================
+# usage_history の INSERT / UPDATE / DELETE で DB トリガーが差分更新する
+# （supabase/migrations/*_item_usage_stats.sql）
+# ここでは読み出しと、直近月からの着用ペースの計算、作り直しだけを行う
+
+STATS_COLUMNS = "item_id, usage_count, first_used_date, last_used_date, monthly_counts"
+
+# 着用ペース（回 / 月）を出す期間
+ROLLING_MONTHS = 3
+
+
+def recent_months(today: date, months: int = ROLLING_MONTHS) -> list[str]:
+    """
+    今月を含む直近 months ヶ月（"YYYY-MM"）
+    """
+    year, month = today.year, today.month
+    keys = []
+    for _ in range(months):
+        keys.append(f"{year:04d}-{month:02d}")
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    return keys
+
+
+def summarize(row: dict | None, today: date | None = None) -> dict:
+    """
+    item_usage_stats の 1 行 → API で返す形
+    行が無い（一度も着ていない）場合は 0 / None
+    """
+    row = row or {}
+    monthly = row.get("monthly_counts") or {}
+    months = recent_months(today or date.today())
+
+    return {
+        "usage_count": row.get("usage_count", 0),
+        "first_used_date": row.get("first_used_date"),
+        "last_used_date": row.get("last_used_date"),
+        "rolling_monthly_rate": round(
+            sum(monthly.get(m, 0) for m in months) / len(months), 2
+        ),
+        "monthly_counts": monthly,
+    }
+
+
+def stats_query(user_id, item_ids=None, client=None):
+    """
+    client に get_async_supabase() を渡すと async view から await できる
+    """
+    query = (
+        (client or supabase)
+        .table("item_usage_stats")
+        .select(STATS_COLUMNS)
+        .eq("user_id", user_id)
+    )
+    if item_ids is not None:
+        query = query.in_("item_id", list(item_ids))
+    return query
+
+
+def rebuild(user_id=None) -> int:
+    """
+    usage_history から作り直す（初回投入・不整合の修復用）
+    user_id を省略すると全ユーザー分。作り直した行数を返す
+    """
+    res = supabase.rpc(
+        "rebuild_item_usage_stats", {"p_user_id": user_id}
+    ).execute()
+    return res.data or 0
@@ -0,0 +1,146 @@
+# backend/api/user_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .caches import build_cache_backend
+
+logger = logging.getLogger(__name__)
+
+# ====================================================
+# ユーザー単位の読み取りキャッシュ
+# ====================================================
+# resource ごとにバージョンを持ち、書き込み時はバージョンを進めるだけで
+# そのユーザーの該当キャッシュ（クエリ違いも含めて）をまとめて無効化する
+
+ITEMS = "items"
+COORDINATIONS = "coordinations"
+STORAGES = "storages"
+DISCARD = "discard"
+DECLUTTER = "declutter"
+
+# アイテム・使用履歴の変更で古くなる一覧
+# （コーデ一覧はアイテムを埋め込んで返すので含める）
+ITEM_RESOURCES = (ITEMS, STORAGES, DISCARD, DECLUTTER, COORDINATIONS)
+
+# プロセス内にしか置けないキャッシュ
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def _check_shared_backend():
+    """
+    worker が複数（WEB_CONCURRENCY > 1）なのにプロセス内キャッシュを使うと、
+    書き込んだ worker でしか invalidate() が効かず、他の worker は古い一覧を返し続ける
+    → 起動時に弾く
+    """
+    if int(os.getenv("WEB_CONCURRENCY", "1")) <= 1:
+        return
+
+    if settings.USER_CACHE_BACKEND == "django":
+        backend = settings.CACHES.get(settings.USER_CACHE_ALIAS, {}).get("BACKEND")
+        if backend not in PROCESS_LOCAL_BACKENDS:
+            return
+
+    raise ImproperlyConfigured(
+        "USER_CACHE_BACKEND must be a cache shared between workers "
+        "when WEB_CONCURRENCY > 1"
+    )
+
+
+_check_shared_backend()
+
+_counter_lock = threading.Lock()
+_counters = {"hits": 0, "misses": 0, "errors": 0}
+
+user_cache = build_cache_backend(
+    settings.USER_CACHE_BACKEND,
+    alias=settings.USER_CACHE_ALIAS,
+    maxsize=settings.USER_CACHE_SIZE,
+    maxbytes=settings.USER_CACHE_MAX_BYTES,
+    # 一覧はネストした dict / list なので JSON にした長さで概算する
+    getsizeof=lambda value: len(json.dumps(value, default=str)),
+)
+
+
+def _count(name: str):
+    with _counter_lock:
+        _counters[name] += 1
+
+
+def _version_key(user_id, resource: str) -> str:
+    return f"user_cache_ver:{user_id}:{resource}"
+
+
+def get_version(user_id, resource: str) -> str:
+    """
+    現在のバージョン（無ければ作る）
+    """
+    key = _version_key(user_id, resource)
+    version = user_cache.get(key)
+    if version is None:
+        version = str(time.time_ns())
+        user_cache.set(key, version, settings.USER_CACHE_VERSION_TTL)
+    return version
+
+
+def invalidate(user_id, *resources: str):
+    """
+    書き込み後に呼ぶ。該当 resource の既存キャッシュは参照されなくなる
+    """
+    for resource in resources:
+        try:
+            user_cache.set(
+                _version_key(user_id, resource),
+                str(time.time_ns()),
+                settings.USER_CACHE_VERSION_TTL,
+            )
+        except Exception as e:
+            # 書き込み自体は済んでいるので失敗させない（古い一覧は TTL で消える）
+            logger.warning(f"user cache invalidate failed: {e}")
+            _count("errors")
+
+
+def get_or_set(user_id, resource: str, fetch, variant: str = "", timeout=None):
+    """
+    キャッシュにあれば返し、無ければ fetch() の結果を保存して返す
+    variant にはクエリ文字列など、同じ resource 内で結果が変わる要素を渡す
+    timeout を省略すると USER_CACHE_TTL
+    fetch() が例外を投げた場合は何も保存しない
+    キャッシュ自体が使えない（テーブル未作成・redis 停止など）場合は毎回 fetch() する
+    """
+    try:
+        version = get_version(user_id, resource)
+        digest = hashlib.sha1(variant.encode()).hexdigest()
+        key = f"user_cache:{user_id}:{resource}:{version}:{digest}"
+        cached = user_cache.get(key)
+    except Exception as e:
+        logger.warning(f"user cache unavailable: {e}")
+        _count("errors")
+        return fetch()
+
+    _count("hits" if cached is not None else "misses")
+    if cached is not None:
+        return cached
+
+    value = fetch()
+    try:
+        user_cache.set(key, value, timeout or settings.USER_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"user cache set failed: {e}")
+        _count("errors")
+    return value
+
+
+def stats() -> dict:
+    with _counter_lock:
+        counters = dict(_counters)
+    return {**counters, "backend": user_cache.stats()}
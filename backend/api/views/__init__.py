@@ -1,8 +1,10 @@
 from .ai_image_analysis import *
+from .cache_stats import *
 from .coordination_items import *
 from .coordinations import *
 from .declutter import *
 from .item_image_batch import *
+from .item_image_upload import *
 from .items_image import *
 from .items import *
 from .protected_view import *
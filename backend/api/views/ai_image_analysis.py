@@ -1,10 +1,24 @@
 # backend/api/views/ai_image_analysis.py
-import requests
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import httpx
+from PIL import UnidentifiedImageError
 from django.conf import settings
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 
+from ..ai_client import get_ai_client
+from ..authentication import get_user_id_from_request
+from ..caches import build_cache_backend
+from ..image_renditions import downscale_jpeg
+from ..subcategory_table import subcategory_table
+
+logger = logging.getLogger(__name__)
+
 
 # ============================================================
 # AI → アプリ用 カテゴリ変換マップ
@@ -78,6 +92,9 @@ def convert_ai_result(raw: dict) -> dict:
     return {
         "category": category_info.get("category"),
         "subcategory_name": subcategory_name,
+        "subcategory_id": subcategory_table.find_id(
+            category_info.get("category"), subcategory_name
+        ),
         "color": COLOR_MAP.get(raw.get("color")),
         "material": MATERIAL_MAP.get(raw.get("material")),
         "pattern": PATTERN_MAP.get(raw.get("pattern")),
@@ -91,71 +108,268 @@ def convert_ai_result(raw: dict) -> dict:
 
 
 # ============================================================
-# View
+# 解析結果キャッシュ（画像 bytes の sha256 → 解析結果）
 # ============================================================
 
-@api_view(["POST"])
-def ai_image_analysis_preview(request):
-    if "file" not in request.FILES:
-        return Response(
-            {"status": "error", "message": "file is required"},
-            status=status.HTTP_400_BAD_REQUEST,
+analysis_cache = build_cache_backend(
+    settings.AI_ANALYSIS_CACHE_BACKEND,
+    alias=settings.AI_ANALYSIS_CACHE_ALIAS,
+    maxsize=settings.AI_ANALYSIS_CACHE_SIZE,
+)
+
+
+def analysis_cache_key(image_bytes: bytes) -> str:
+    return f"ai_analysis:{hashlib.sha256(image_bytes).hexdigest()}"
+
+
+# ============================================================
+# AI API に送る前の前処理（EXIF 回転・縮小・再エンコード）
+# ============================================================
+
+def preprocess_image(image_bytes: bytes, filename: str, content_type: str):
+    """
+    (送信する bytes, ファイル名, content-type, 計測値) を返す
+    開けない画像（HEIC など）はそのまま送る
+    """
+    started = time.perf_counter()
+
+    try:
+        processed = downscale_jpeg(
+            image_bytes,
+            max_edge=settings.AI_IMAGE_MAX_EDGE,
+            quality=settings.AI_IMAGE_JPEG_QUALITY,
         )
+    except (UnidentifiedImageError, OSError) as e:
+        logger.warning(f"AI preprocess skipped: {e}")
+        processed = None
+
+    # 縮小しても小さくならない場合は元画像を送る
+    if processed is not None and len(processed) < len(image_bytes):
+        body = processed
+        filename = f"{filename.rsplit('.', 1)[0]}.jpg"
+        content_type = "image/jpeg"
+    else:
+        body = image_bytes
+
+    stats = {
+        "original_bytes": len(image_bytes),
+        "sent_bytes": len(body),
+        "preprocess_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info(f"AI preprocess: {stats}")
+
+    return body, filename, content_type, stats
+
 
+# ============================================================
+# View
+# ============================================================
+
+def analyze_image(image_bytes: bytes, filename: str, content_type: str):
+    """
+    1 枚分の解析（キャッシュ → 前処理 → AI API → 変換）
+    (レスポンス body, HTTP status) を返す
+    """
     api_url = settings.AI_IMAGE_ANALYSIS_API_URL
-    timeout = settings.AI_IMAGE_ANALYSIS_TIMEOUT
 
-    if not api_url:
-        return Response(
-            {"status": "error", "message": "AI API URL is not configured"},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+    # 同じ画像なら AI API を呼ばずに返す
+    cache_key = analysis_cache_key(image_bytes)
+    cached = analysis_cache.get(cache_key)
+    if cached:
+        # 変換は読み出すたびに行う（subcategory_id は参照テーブルの状態で変わる）
+        return (
+            {
+                "status": "success",
+                "ai_raw": cached["ai_raw"],
+                "result": convert_ai_result(cached["ai_raw"]),
+                "cached": True,
+            },
+            status.HTTP_200_OK,
         )
 
-    image_file = request.FILES["file"]
+    body, filename, content_type, preprocess_stats = preprocess_image(
+        image_bytes, filename, content_type
+    )
 
     try:
-        response = requests.post(
+        response = get_ai_client().post(
             f"{api_url}/predict",
             files={
                 "file": (
-                    image_file.name,
-                    image_file.read(),
-                    image_file.content_type,
+                    filename,
+                    body,
+                    content_type,
                 )
             },
-            timeout=timeout,
         )
         response.raise_for_status()
         raw_ai_result = response.json()
 
-    except requests.Timeout:
-        return Response(
+    except httpx.TimeoutException:
+        return (
             {"status": "error", "message": "AI API timeout"},
-            status=status.HTTP_504_GATEWAY_TIMEOUT,
+            status.HTTP_504_GATEWAY_TIMEOUT,
         )
 
-    except requests.RequestException as e:
-        return Response(
+    except httpx.HTTPError as e:
+        return (
             {
                 "status": "error",
                 "message": "AI API request failed",
                 "detail": str(e),
             },
-            status=status.HTTP_502_BAD_GATEWAY,
+            status.HTTP_502_BAD_GATEWAY,
         )
 
     except ValueError:
-        return Response(
+        return (
             {"status": "error", "message": "Invalid AI API response"},
-            status=status.HTTP_502_BAD_GATEWAY,
+            status.HTTP_502_BAD_GATEWAY,
         )
 
     converted = convert_ai_result(raw_ai_result)
 
-    return Response(
+    # キャッシュするのは AI の生レスポンスだけ
+    analysis_cache.set(
+        cache_key,
+        {"ai_raw": raw_ai_result},
+        settings.AI_ANALYSIS_CACHE_TTL,
+    )
+
+    return (
         {
             "status": "success",
             "ai_raw": raw_ai_result,
             "result": converted,
-        }
+            "cached": False,
+            "preprocess": preprocess_stats,
+        },
+        status.HTTP_200_OK,
     )
+
+
+@api_view(["POST"])
+def ai_image_analysis_preview(request):
+    if "file" not in request.FILES:
+        return Response(
+            {"status": "error", "message": "file is required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not settings.AI_IMAGE_ANALYSIS_API_URL:
+        return Response(
+            {"status": "error", "message": "AI API URL is not configured"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    image_file = request.FILES["file"]
+    payload, http_status = analyze_image(
+        image_file.read(), image_file.name, image_file.content_type
+    )
+
+    return Response(payload, status=http_status)
+
+
+def wait_with_deadline(future, started_at, deadline: float) -> dict:
+    """
+    解析開始（started_at() が時刻を返してから）deadline 秒まで結果を待つ
+    締め切りを過ぎたら timeout のエラー payload を返す
+    """
+    while True:
+        start = started_at()
+        # まだ待ち行列にいる → 開始するまで少しずつ待つ
+        wait = 0.1 if start is None else start + deadline - time.monotonic()
+        try:
+            return future.result(timeout=max(wait, 0))
+        except FutureTimeoutError:
+            if start is not None:
+                future.cancel()
+                return {"status": "error", "message": "AI API timeout"}
+
+
+@api_view(["POST"])
+def ai_image_analysis_preview_batch(request):
+    """
+    複数画像をまとめて解析する
+    POST /api/ai_image_analysis/preview/batch/  (multipart: files=...)
+
+    AI API へは AI_IMAGE_ANALYSIS_BATCH_CONCURRENCY 並列で送り、
+    結果は送信順に 1 件ずつ返す（失敗した画像があっても他は返す）
+    1 枚あたり解析開始から AI_IMAGE_ANALYSIS_BATCH_ITEM_DEADLINE 秒で打ち切る
+    """
+    user_id, err_response = get_user_id_from_request(request)
+    if err_response:
+        return err_response
+
+    image_files = request.FILES.getlist("files")
+
+    if not image_files:
+        return Response(
+            {"status": "error", "message": "files is required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if len(image_files) > settings.AI_IMAGE_ANALYSIS_BATCH_MAX_FILES:
+        return Response(
+            {
+                "status": "error",
+                "message": f"files must be at most "
+                           f"{settings.AI_IMAGE_ANALYSIS_BATCH_MAX_FILES}",
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not settings.AI_IMAGE_ANALYSIS_API_URL:
+        return Response(
+            {"status": "error", "message": "AI API URL is not configured"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    inputs = [
+        (f.read(), f.name, f.content_type)
+        for f in image_files
+    ]
+
+    # index → 解析を始めた時刻（待ち行列にいる間は締め切りを数えない）
+    started: dict[int, float] = {}
+
+    def run(i, args):
+        started[i] = time.monotonic()
+        try:
+            payload, _ = analyze_image(*args)
+            return payload
+        except Exception as e:
+            logger.exception(f"batch analysis failed: {args[1]}")
+            return {"status": "error", "message": "Analysis failed", "detail": str(e)}
+
+    deadline = settings.AI_IMAGE_ANALYSIS_BATCH_ITEM_DEADLINE
+    workers = min(settings.AI_IMAGE_ANALYSIS_BATCH_CONCURRENCY, len(inputs))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(run, i, args) for i, args in enumerate(inputs)]
+        payloads = [
+            wait_with_deadline(future, lambda i=i: started.get(i), deadline)
+            for i, future in enumerate(futures)
+        ]
+    finally:
+        # 打ち切った画像の完了は待たない（待ち行列に残ったものは取り消す）
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = [
+        {"index": i, "filename": name, **payload}
+        for i, ((_, name, _), payload) in enumerate(zip(inputs, payloads))
+    ]
+
+    return Response({"status": "success", "results": results})
+
+
+@api_view(["GET"])
+def ai_image_analysis_pool_stats(request):
+    """
+    AI API へのコネクションプールの状態（再利用率の確認用）
+    """
+    user_id, err_response = get_user_id_from_request(request)
+    if err_response:
+        return err_response
+
+    return Response({"status": "success", "data": get_ai_client().stats()})
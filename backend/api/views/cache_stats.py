@@ -0,0 +1,18 @@
+# backend/api/views/cache_stats.py
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from ..authentication import get_user_id_from_request
+from .. import user_cache
+
+
+@api_view(["GET"])
+def cache_stats(request):
+    """
+    ユーザー単位の一覧キャッシュのヒット率（この worker の分）
+    """
+    user_id, err_response = get_user_id_from_request(request)
+    if err_response:
+        return err_response
+
+    return Response({"status": "success", "data": user_cache.stats()})
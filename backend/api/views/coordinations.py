@@ -1,31 +1,17 @@
 # frontend/api/views/coordinations.py
+from django.conf import settings
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from ..supabase_client import supabase
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
+from postgrest.exceptions import APIError
+from ..supabase_client import supabase, get_async_supabase
+from ..authentication import get_user_id_from_request
+from .. import user_cache
+from ..etag import with_etag, conditional_response
+from ..signed_urls import generate_image_urls
 import traceback
 
-# ==========================
-# JWT → user_id 抽出共通処理
-# ==========================
-def get_user_id_from_request(request):
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return None, Response(
-            {"status": "error", "message": "Authorization header missing"},
-            status=401
-        )
-
-    token = auth_header.split(" ")[1]
-    user = supabase.auth.get_user(token)
-    if not user or not user.user:
-        return None, Response(
-            {"status": "error", "message": "Invalid token"},
-            status=401
-        )
-
-    return user.user.id, None
-
-
 # ==========================
 # item_signature 共通関数
 # ==========================
@@ -45,113 +31,177 @@ def build_item_signature(items):
         return ""
 
 
+# ==========================
+# 作成 / 更新（RPC 1 回・トランザクション）
+# ==========================
+# save_coordination のエラーコード → (HTTP ステータス, メッセージ)
+SAVE_ERRORS = {
+    "23505": (400, "同じアイテムの組み合わせのコーデが既に存在します"),
+    "P0002": (404, "Coordination not found"),
+    "23503": (400, "存在しないアイテムが含まれています"),
+}
+
+# 更新時は重複の文言だけ変える
+UPDATE_ERRORS = {
+    **SAVE_ERRORS,
+    "23505": (400, "同じアイテム構成の別コーデが既に存在します"),
+}
+
+
+def save_coordination_rpc(client, user_id, coordination_id, data, item_signature, items):
+    return client.rpc("save_coordination", {
+        "p_user_id": user_id,
+        "p_coordination_id": coordination_id,
+        "p_name": data.get("name"),
+        "p_is_favorite": data.get("is_favorite"),
+        "p_item_ids": sorted({int(item_id) for item_id in items}),
+        "p_item_signature": item_signature,
+    })
+
+
+def save_error_response(e: APIError, coordination_id):
+    """
+    save_coordination の既知のエラー → Response（未知のエラーは None）
+    """
+    errors = SAVE_ERRORS if coordination_id is None else UPDATE_ERRORS
+    if e.code not in errors:
+        return None
+    status_code, message = errors[e.code]
+    return Response(
+        {"status": "error", "message": message},
+        status=status_code
+    )
+
+
+def signature_error_response():
+    return Response(
+        {"status": "error", "message": "item_signature の生成に失敗しました"},
+        status=400
+    )
+
+
+def save_coordination(user_id, coordination_id, data, items):
+    """
+    coordinations と coordination_items をまとめて保存する
+    更新時の coordination_items は差分（追加・削除された item_id）だけ書き込む
+    重複は (user_id, item_signature) の一意制約で判定
+    戻り値: (coordination_id, エラー時の Response)
+    """
+    item_signature = build_item_signature(items)
+    if not item_signature:
+        return None, signature_error_response()
+
+    try:
+        res = save_coordination_rpc(
+            supabase, user_id, coordination_id, data, item_signature, items
+        ).execute()
+    except APIError as e:
+        error = save_error_response(e, coordination_id)
+        if error is None:
+            raise
+        return None, error
+
+    user_cache.invalidate(user_id, user_cache.COORDINATIONS)
+    return res.data, None
+
+
+async def asave_coordination(user_id, coordination_id, data, items):
+    """
+    save_coordination の async 版（async view から使う）
+    """
+    item_signature = build_item_signature(items)
+    if not item_signature:
+        return None, signature_error_response()
+
+    try:
+        res = await save_coordination_rpc(
+            get_async_supabase(), user_id, coordination_id, data, item_signature, items
+        ).execute()
+    except APIError as e:
+        error = save_error_response(e, coordination_id)
+        if error is None:
+            raise
+        return None, error
+
+    # キャッシュ（DatabaseCache など）は同期 API なのでスレッドで
+    await sync_to_async(user_cache.invalidate)(user_id, user_cache.COORDINATIONS)
+    return res.data, None
+
+
 # ====================================================
 # コーディネート一覧取得 / 新規作成（items 付き）
 # ====================================================
-@api_view(['GET', 'POST'])
-def coordinations_list_create(request):
+@async_api_view(['GET', 'POST'])
+async def coordinations_list_create(request):
     user_id, err_response = get_user_id_from_request(request)
     if err_response:
         return err_response
 
     # --------------------------
-    # GET
+    # GET（キャッシュ経由なのでスレッドで）
     # --------------------------
     if request.method == 'GET':
-        try:
-            response = (
-                supabase
-                .table("coordinations")
-                .select("*")
-                .eq("user_id", user_id)
-                .execute()
-            )
-            return Response({"status": "success", "data": response.data})
-
-        except Exception as e:
-            traceback.print_exc()
-            return Response(
-                {"status": "error", "message": str(e)},
-                status=500
-            )
+        return await sync_to_async(list_coordinations)(request, user_id)
 
     # --------------------------
     # POST（新規作成）
     # --------------------------
-    elif request.method == 'POST':
-        data = request.data.copy()
-        data.setdefault("is_favorite", False)
-        items = data.pop("items", [])
+    data = request.data.copy()
+    items = data.pop("items", [])
 
-        if not isinstance(items, list) or len(items) == 0:
-            return Response(
-                {"status": "error", "message": "items は1つ以上必要です"},
-                status=400
-            )
+    if not isinstance(items, list) or len(items) == 0:
+        return Response(
+            {"status": "error", "message": "items は1つ以上必要です"},
+            status=400
+        )
 
-        try:
-            # user_id 設定
-            data["user_id"] = user_id
+    try:
+        coordination_id, error = await asave_coordination(user_id, None, data, items)
+        if error:
+            return error
 
-            # item_signature 作成
-            item_signature = build_item_signature(items)
-            if not item_signature:
-                return Response(
-                    {"status": "error", "message": "item_signature の生成に失敗しました"},
-                    status=400
-                )
+        return Response(
+            {
+                "status": "success",
+                "coordination_id": coordination_id
+            }
+        )
 
-            data["item_signature"] = item_signature
+    except Exception as e:
+        traceback.print_exc()
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=500
+        )
 
-            # ★ 重複チェック
-            exists = (
+
+def list_coordinations(request, user_id):
+    try:
+        def fetch():
+            response = (
                 supabase
                 .table("coordinations")
-                .select("coordination_id")
+                .select("*")
                 .eq("user_id", user_id)
-                .eq("item_signature", item_signature)
                 .execute()
             )
+            return response.data
 
-            if exists.data:
-                return Response(
-                    {
-                        "status": "error",
-                        "message": "同じアイテムの組み合わせのコーデが既に存在します"
-                    },
-                    status=400
-                )
-
-            # coordination 作成
-            inserted = supabase.table("coordinations").insert(data).execute()
-            if not inserted.data:
-                return Response(
-                    {"status": "error", "message": "Failed to create coordination"},
-                    status=500
-                )
-
-            coordination_id = inserted.data[0]["coordination_id"]
-
-            # 中間テーブル登録
-            link_rows = [
-                {"coordination_id": coordination_id, "item_id": item_id}
-                for item_id in items
-            ]
-            supabase.table("coordination_items").insert(link_rows).execute()
-
-            return Response(
-                {
-                    "status": "success",
-                    "coordination_id": coordination_id
-                }
-            )
+        cached = user_cache.get_or_set(
+            user_id, user_cache.COORDINATIONS, lambda: with_etag(fetch())
+        )
+        return conditional_response(
+            request,
+            {"status": "success", "data": cached["data"]},
+            cached["etag"],
+        )
 
-        except Exception as e:
-            traceback.print_exc()
-            return Response(
-                {"status": "error", "message": str(e)},
-                status=500
-            )
+    except Exception as e:
+        traceback.print_exc()
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=500
+        )
 
 
 # ====================================================
@@ -164,25 +214,25 @@ def coordination_detail(request, coordination_id):
         return err_response
 
     try:
-        existing = (
-            supabase
-            .table("coordinations")
-            .select("*")
-            .eq("coordination_id", coordination_id)
-            .eq("user_id", user_id)
-            .execute()
-        )
-
-        if not existing.data:
-            return Response(
-                {"status": "error", "message": "Coordination not found"},
-                status=404
-            )
-
         # --------------------------
         # GET
         # --------------------------
         if request.method == 'GET':
+            existing = (
+                supabase
+                .table("coordinations")
+                .select("*")
+                .eq("coordination_id", coordination_id)
+                .eq("user_id", user_id)
+                .execute()
+            )
+
+            if not existing.data:
+                return Response(
+                    {"status": "error", "message": "Coordination not found"},
+                    status=404
+                )
+
             return Response(
                 {"status": "success", "data": existing.data[0]}
             )
@@ -200,49 +250,11 @@ def coordination_detail(request, coordination_id):
                     status=400
                 )
 
-            # ① signature 作成
-            item_signature = build_item_signature(items)
-            if not item_signature:
-                return Response(
-                    {"status": "error", "message": "item_signature の生成に失敗しました"},
-                    status=400
-                )
-
-            # ② 重複チェック（自分以外）
-            exists = (
-                supabase
-                .table("coordinations")
-                .select("coordination_id")
-                .eq("user_id", user_id)
-                .eq("item_signature", item_signature)
-                .neq("coordination_id", coordination_id)
-                .execute()
-            )
-
-            if exists.data:
-                return Response(
-                    {
-                        "status": "error",
-                        "message": "同じアイテム構成の別コーデが既に存在します"
-                    },
-                    status=400
-                )
-
-            # ③ coordination 更新
-            supabase.table("coordinations").update({
-                **data,
-                "item_signature": item_signature
-            }).eq("coordination_id", coordination_id).execute()
-
-            # ④ 中間テーブル全置換
-            supabase.table("coordination_items").delete() \
-                .eq("coordination_id", coordination_id).execute()
-
-            rows = [
-                {"coordination_id": coordination_id, "item_id": item_id}
-                for item_id in items
-            ]
-            supabase.table("coordination_items").insert(rows).execute()
+            # 本体更新・中間テーブルの差分更新・重複チェック（一意制約）を 1 回の RPC で
+            # item_signature が変わらなければ中間テーブルには書き込まない
+            _, error = save_coordination(user_id, coordination_id, data, items)
+            if error:
+                return error
 
             return Response({"status": "success"})
 
@@ -250,7 +262,7 @@ def coordination_detail(request, coordination_id):
         # DELETE
         # --------------------------
         elif request.method == 'DELETE':
-            (
+            deleted = (
                 supabase
                 .table("coordinations")
                 .delete()
@@ -259,6 +271,14 @@ def coordination_detail(request, coordination_id):
                 .execute()
             )
 
+            if not deleted.data:
+                return Response(
+                    {"status": "error", "message": "Coordination not found"},
+                    status=404
+                )
+
+            user_cache.invalidate(user_id, user_cache.COORDINATIONS)
+
             return Response(
                 {"status": "success", "message": "Coordination deleted"}
             )
@@ -269,3 +289,117 @@ def coordination_detail(request, coordination_id):
             {"status": "error", "message": str(e)},
             status=500
         )
+
+
+# ====================================================
+# コーデ一覧（アイテム・サムネイル付き）
+# ====================================================
+# 一覧カードとフィルタに使う列だけ
+COORDINATION_ITEM_FIELDS = (
+    "item_id, name, category, subcategory_id, image_url, "
+    "color, material, pattern, season_tag, tpo_tags, is_favorite, status"
+)
+
+
+@api_view(['GET'])
+def coordinations_with_items(request):
+    """
+    自分のコーデを、所属アイテムとサムネイル URL 付きで返す
+
+    GET /api/coordinations/with_items/?limit=50&cursor=<coordination_id>
+        &thumbnails=1&size=thumb&format=webp
+
+    - coordinations → coordination_items → items を 1 回の埋め込み select で取得
+    - thumbnails=1 のときページ内の画像をまとめて 1 回で署名
+    - coordination_id 降順のキーセットページング（next_cursor）
+    """
+    user_id, err_response = get_user_id_from_request(request)
+    if err_response:
+        return err_response
+
+    params = request.GET
+
+    try:
+        limit = int(params.get("limit") or settings.COORDINATIONS_PAGE_DEFAULT_LIMIT)
+        cursor = int(params["cursor"]) if params.get("cursor") else None
+    except ValueError as e:
+        return Response({"status": "error", "message": str(e)}, status=400)
+
+    limit = max(1, min(limit, settings.COORDINATIONS_PAGE_MAX_LIMIT))
+
+    def fetch():
+        query = (
+            supabase
+            .table("coordinations")
+            .select(
+                "coordination_id, name, is_favorite, item_signature, "
+                f"coordination_items(items({COORDINATION_ITEM_FIELDS}))"
+            )
+            .eq("user_id", user_id)
+            .order("coordination_id", desc=True)
+            .limit(limit)
+        )
+        if cursor is not None:
+            query = query.lt("coordination_id", cursor)
+
+        rows = query.execute().data or []
+
+        data = []
+        for row in rows:
+            links = row.pop("coordination_items", None) or []
+            items = [
+                link["items"] for link in links
+                if link.get("items") and link["items"].get("status") != "deleted"
+            ]
+            items.sort(key=lambda item: item["item_id"])
+            data.append({**row, "items": items})
+
+        next_cursor = (
+            str(rows[-1]["coordination_id"]) if len(rows) == limit else None
+        )
+        return {"data": data, "next_cursor": next_cursor}
+
+    try:
+        # 署名前の結果をキャッシュ（URL は signed_urls 側でキャッシュ）
+        page = user_cache.get_or_set(
+            user_id,
+            user_cache.COORDINATIONS,
+            fetch,
+            variant=f"with_items:{limit}:{cursor}",
+        )
+        data = page["data"]
+
+        if params.get("thumbnails") in ("1", "true"):
+            signed_urls = generate_image_urls(
+                [
+                    item["image_url"]
+                    for coordination in data
+                    for item in coordination["items"]
+                    if item.get("image_url")
+                ],
+                params.get("size") or "thumb",
+                params.get("format"),
+            )
+            data = [
+                {
+                    **coordination,
+                    "items": [
+                        {**item, "thumbnail_url": signed_urls.get(item.get("image_url"))}
+                        for item in coordination["items"]
+                    ],
+                }
+                for coordination in data
+            ]
+
+        return Response({
+            "status": "success",
+            "data": data,
+            "next_cursor": page["next_cursor"],
+        })
+
+    except Exception as e:
+        traceback.print_exc()
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=500
+        )
@@ -1,23 +1,88 @@
 # backend/api/views/declutter.py
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timezone
+
+from django.conf import settings
 from rest_framework.decorators import api_view
+from adrf.decorators import api_view as async_api_view
 from rest_framework.response import Response
 from rest_framework import status
-from datetime import date
 
-from ..supabase_client import supabase
-from .coordinations import get_user_id_from_request
+from ..supabase_client import supabase, get_async_supabase
+from ..authentication import get_user_id_from_request
+from .. import user_cache
+from ..declutter_rules import (
+    DECLUTTER_RULES,
+    ScoringFrame,
+    apply_overrides,
+    get_current_season,
+    merge_overrides,
+)
+
+logger = logging.getLogger(__name__)
+
+# what-if で一度に比較できるシナリオ数
+WHAT_IF_MAX_SCENARIOS = 10
+
+# 登録からこの日数未満のアイテムは候補にしない
+MIN_AGE_DAYS = 90
+
+
+def suggestion_rows_query(user_id, client=None):
+    """
+    採点前の候補行（items + item_usage_stats）
+    削除済み・処分予定・クールダウン中・登録 MIN_AGE_DAYS 日未満は返ってこない
+    """
+    return (client or supabase).rpc("declutter_suggestion_rows", {
+        "p_user_id": user_id,
+        "p_min_age": MIN_AGE_DAYS,
+        "p_cooldown_days": settings.DECLUTTER_COOLDOWN_DAYS,
+    })
+
+
+def candidate_rows_rpc(user_id, rules: dict, limit: int | None = None):
+    """
+    DB 側で採点・絞り込み済みの候補行（score 降順）
+    お気に入り・クールダウン中・review に届かない行は返ってこない
+    """
+    return supabase.rpc("declutter_candidate_rows", {
+        "p_user_id": user_id,
+        "p_season": get_current_season(),
+        "p_rules": rules,
+        "p_min_age": MIN_AGE_DAYS,
+        "p_limit": limit,
+        "p_cooldown_days": settings.DECLUTTER_COOLDOWN_DAYS,
+    })
+
+
+def overrides_query(user_id, client=None):
+    return (
+        (client or supabase)
+        .table("declutter_rule_overrides")
+        .select("overrides")
+        .eq("user_id", user_id)
+    )
+
 
+def user_rules(overrides_res) -> tuple[dict, dict]:
+    """
+    保存済みの上書きを当てたルール表（壊れた上書きは無視して既定値）
+    """
+    overrides = overrides_res.data[0]["overrides"] if overrides_res.data else {}
+    try:
+        return apply_overrides(overrides), overrides
+    except ValueError as e:
+        logger.warning(f"declutter rule overrides ignored: {e}")
+        return apply_overrides(None), {}
 
-def get_current_season() -> str:
-    month = date.today().month
-    if month in (12, 1, 2):
-        return "冬"
-    elif month in (3, 4, 5):
-        return "春"
-    elif month in (6, 7, 8):
-        return "夏"
-    else:
-        return "秋"
+
+def tier_counts(results: list[dict]) -> dict:
+    counts = {tier["key"]: 0 for tier in DECLUTTER_RULES["tiers"]}
+    for result in results:
+        counts[result["tier"]] = counts.get(result["tier"], 0) + 1
+    return counts
 
 
 @api_view(["GET"])
@@ -25,134 +90,204 @@ def declutter_candidates(request):
     """
     断捨離候補一覧を返す API（本番用・完成版）
 
+    - ルール表（declutter_rules.py + ユーザー別の上書き）で採点
+    - 採点・絞り込み・並べ替えは DB（declutter_candidate_rows）で行い、
+      候補行だけを受け取って score_breakdown を組み立てる
     - tier 判定（review / strong）
     - 季節補正
-    - クールダウンは view 側で処理済み
+    - 保留から DECLUTTER_COOLDOWN_DAYS 日以内（クールダウン）は DB 側で除外
+    - ?limit=N で score 上位 N 件
+    - 結果はユーザー単位で日付・季節ごとにキャッシュ（cache_age 秒前の結果）
+      使用履歴・ステータス・アイテム・ルールの変更で破棄
+      （backend を通した書き込みで破棄する。SQL 直接の変更は DECLUTTER_CACHE_TTL で反映）
+    """
+
+    user_id, err_response = get_user_id_from_request(request)
+    if err_response:
+        return err_response
+
+    try:
+        limit = int(request.GET["limit"]) if request.GET.get("limit") else None
+    except ValueError as e:
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if limit is not None:
+        limit = max(1, min(limit, settings.DECLUTTER_CANDIDATES_MAX_LIMIT))
+
+    def fetch():
+        rules, _ = user_rules(overrides_query(user_id).execute())
+        rows = candidate_rows_rpc(user_id, rules, limit).execute().data or []
+
+        # 行は絞り込み済み。ここでは理由の組み立てと、念のための tier 判定だけ
+        return {"data": ScoringFrame(rows).score(rules), "cached_at": time.time()}
+
+    try:
+        today = date.today()
+        variant = ":".join([
+            today.isoformat(),
+            get_current_season(today),
+            str(limit),
+        ])
+        entry = user_cache.get_or_set(
+            user_id,
+            user_cache.DECLUTTER,
+            fetch,
+            variant=variant,
+            timeout=settings.DECLUTTER_CACHE_TTL,
+        )
+
+    except Exception as e:
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    return Response({
+        "status": "success",
+        "data": entry["data"],
+        "cached_at": datetime.fromtimestamp(entry["cached_at"], timezone.utc).isoformat(),
+        "cache_age": int(time.time() - entry["cached_at"]),
+    }, status=status.HTTP_200_OK)
+
+
+@async_api_view(["POST"])
+async def declutter_what_if(request):
     """
+    しきい値を変えた場合の候補を比較する（保存はしない）
 
+    POST /api/items/declutter_candidates/what_if/
+    {
+        "scenarios": {
+            "strict": {"tiers": {"review": 9}},
+            "loose": {"last_use": {"6m": {"threshold": 120}}}
+        }
+    }
+
+    行の取得は 1 回だけで、各シナリオは同じ配列を採点し直す
+    baseline は現在の（ユーザー別上書き込みの）ルール表
+    各シナリオはユーザー別の上書きにさらに重ねて評価する
+    """
     user_id, err_response = get_user_id_from_request(request)
     if err_response:
         return err_response
 
+    scenarios = request.data.get("scenarios") or {}
+    if not isinstance(scenarios, dict):
+        return Response(
+            {"status": "error", "message": "scenarios はオブジェクトで指定してください"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(scenarios) > WHAT_IF_MAX_SCENARIOS:
+        return Response(
+            {"status": "error", "message": f"scenarios は最大 {WHAT_IF_MAX_SCENARIOS} 件です"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # 形の検証だけ先に（DB に問い合わせる前に 400 を返す）
     try:
-        res = (
-            supabase
-            .table("item_usage_summary_for_suggestion")
-            .select(
-                "item_id, name, category, is_favorite, season_tag, "
-                "usage_count, last_used_date, "
-                "days_since_created, days_since_last_use, monthly_usage_rate"
-            )
-
-            .eq("user_id", user_id)
-            .gte("days_since_created", 90)
-            .execute()
+        for overrides in scenarios.values():
+            apply_overrides(overrides)
+    except ValueError as e:
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=status.HTTP_400_BAD_REQUEST
         )
-        rows = res.data or []
 
+    try:
+        client = get_async_supabase()
+        rows_res, overrides_res = await asyncio.gather(
+            suggestion_rows_query(user_id, client).execute(),
+            overrides_query(user_id, client).execute(),
+        )
     except Exception as e:
         return Response(
             {"status": "error", "message": str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
-    current_season = get_current_season()
-    results = []
-
-    for row in rows:
-        # ---------------------------------
-        # 安全装置
-        # ---------------------------------
-        if row["is_favorite"]:
-            continue
-
-        score = 0
-        score_breakdown = []
-
-        def add_score(reason: str, point: int):
-            nonlocal score
-            score += point
-            score_breakdown.append({
-                "reason": reason,
-                "point": point,
+    frame = ScoringFrame(rows_res.data or [])
+    baseline_rules, user_overrides = user_rules(overrides_res)
+
+    # どちらも検証済みなので重ねても ValueError にはならない
+    scenario_rules = {
+        name: apply_overrides(merge_overrides(user_overrides, overrides))
+        for name, overrides in scenarios.items()
+    }
+
+    def summarize(rules):
+        results = frame.score(rules)
+        return {
+            "count": len(results),
+            "tiers": tier_counts(results),
+            "candidates": results,
+        }
+
+    return Response({
+        "status": "success",
+        "item_count": len(frame.rows),
+        "baseline": summarize(baseline_rules),
+        "scenarios": {
+            name: summarize(rules) for name, rules in scenario_rules.items()
+        },
+    })
+
+
+@api_view(["GET", "PUT", "DELETE"])
+def declutter_rules(request):
+    """
+    ユーザー別のルール上書き
+
+    GET    既定のルール表・保存済みの上書き・適用後のルール表
+    PUT    {"overrides": {...}} を保存（検証してから）
+    DELETE 上書きを削除して既定値に戻す
+    """
+    user_id, err_response = get_user_id_from_request(request)
+    if err_response:
+        return err_response
+
+    try:
+        if request.method == "GET":
+            rules, overrides = user_rules(overrides_query(user_id).execute())
+            return Response({
+                "status": "success",
+                "defaults": DECLUTTER_RULES,
+                "overrides": overrides,
+                "rules": rules,
             })
 
-        # ---------------------------------
-        # 登録期間
-        # ---------------------------------
-        dsc = row["days_since_created"]
-
-        if dsc >= 365:
-            add_score("登録から1年以上経過しています", 3)
-        elif dsc >= 180:
-            add_score("登録から半年以上経過しています", 2)
-        elif dsc >= 90:
-            add_score("登録から3ヶ月以上経過しています", 1)
-
-        # ---------------------------------
-        # 最終使用日
-        # ---------------------------------
-        if row["last_used_date"] is None:
-            add_score("一度も使用されていません", 4)
-        else:
-            dslu = row["days_since_last_use"]
-            if dslu >= 365:
-                add_score("1年以上使用されていません", 5)
-            elif dslu >= 180:
-                add_score("半年以上使用されていません", 3)
-            elif dslu >= 90:
-                add_score("3ヶ月以上使用されていません", 1)
-
-        # ---------------------------------
-        # 使用頻度
-        # ---------------------------------
-        mur = row["monthly_usage_rate"]
-
-        if mur < 0.2:
-            add_score("ほとんど使用されていません", 3)
-        elif mur < 0.5:
-            add_score("使用頻度が低いです", 2)
-        elif mur < 1:
-            add_score("たまにしか使用されていません", 1)
-
-        # ---------------------------------
-        # 季節補正
-        # ---------------------------------
-        item_seasons = row.get("season_tag", [])
-
-        if item_seasons and current_season:
-            if current_season not in item_seasons:
-                add_score("季節外のため、判断を保留します", -2)
-
-        # ---------------------------------
-        # tier 判定
-        # ---------------------------------
-        if score >= 9:
-            tier = "strong"
-            tier_label = "強い断捨離候補"
-        elif score >= 7:
-            tier = "review"
-            tier_label = "見直し候補"
-        else:
-            continue
-
-        # ---------------------------------
-        # レスポンス
-        # ---------------------------------
-        results.append({
-            "item_id": row["item_id"],
-            "name": row["name"],
-            "declutter_score": score,
-            "tier": tier,
-            "tier_label": tier_label,
-            "score_breakdown": score_breakdown,
-            "stats": {
-                "usage_count": row["usage_count"],
-                "last_used_date": row["last_used_date"],
-                "days_since_created": row["days_since_created"],
-                "days_since_last_use": row["days_since_last_use"],
-                "monthly_usage_rate": row["monthly_usage_rate"],
-            }
-        })
-
-    return Response(results, status=status.HTTP_200_OK)
+        if request.method == "PUT":
+            overrides = request.data.get("overrides") or {}
+            try:
+                rules = apply_overrides(overrides)
+            except ValueError as e:
+                return Response(
+                    {"status": "error", "message": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            supabase.table("declutter_rule_overrides").upsert({
+                "user_id": user_id,
+                "overrides": overrides,
+            }).execute()
+            user_cache.invalidate(user_id, user_cache.DECLUTTER)
+
+            return Response({
+                "status": "success",
+                "overrides": overrides,
+                "rules": rules,
+            })
+
+        supabase.table("declutter_rule_overrides").delete().eq(
+            "user_id", user_id
+        ).execute()
+        user_cache.invalidate(user_id, user_cache.DECLUTTER)
+        return Response({"status": "success", "rules": DECLUTTER_RULES})
+
+    except Exception as e:
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
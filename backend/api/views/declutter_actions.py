@@ -1,10 +1,36 @@
 from rest_framework.decorators import api_view
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
 from rest_framework.response import Response
 from rest_framework import status
 from datetime import datetime, timezone
+import asyncio
 
-from ..supabase_client import supabase
-from .coordinations import get_user_id_from_request
+from django.conf import settings
+
+from ..supabase_client import supabase, get_async_supabase
+from ..authentication import get_user_id_from_request
+from .. import user_cache
+
+
+def build_update_data(action, now: str) -> dict | None:
+    """
+    action → items に書き込む内容（不正な action は None）
+    """
+    if action == "pending":
+        return {"status": "pending", "status_updated_at": now}
+
+    if action == "discard":
+        return {"status": "discard", "status_updated_at": now}
+
+    if action == "favorite":
+        return {"is_favorite": True}
+
+    if action == "restore":
+        # 処分予定の取り消し
+        return {"status": "active", "status_updated_at": now}
+
+    return None
 
 
 @api_view(["POST"])
@@ -23,22 +49,10 @@ def update_declutter_status(request):
         )
 
     try:
-        update_data = {}
-
         now = datetime.now(timezone.utc).isoformat()
+        update_data = build_update_data(action, now)
 
-        if action == "pending":
-            update_data["status"] = "pending"
-            update_data["status_updated_at"] = now
-
-        elif action == "discard":
-            update_data["status"] = "discard"
-            update_data["status_updated_at"] = now
-
-        elif action == "favorite":
-            update_data["is_favorite"] = True
-
-        else:
+        if update_data is None:
             return Response(
                 {"message": "不正な action です"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -49,6 +63,7 @@ def update_declutter_status(request):
             .eq("item_id", item_id) \
             .eq("user_id", user_id) \
             .execute()
+        user_cache.invalidate(user_id, *user_cache.ITEM_RESOURCES)
 
         return Response({"status": "ok"})
 
@@ -57,3 +72,106 @@ def update_declutter_status(request):
             {"status": "error", "message": str(e)},
             status=500
         )
+
+
+@async_api_view(["POST"])
+async def bulk_update_declutter_status(request):
+    """
+    断捨離アクションをまとめて適用する
+
+    POST /api/items/declutter/action/bulk/
+    {"actions": [{"item_id": 1, "action": "discard"}, {"item_id": 2, "action": "pending"}]}
+
+    - action ごとに 1 回の UPDATE（item_id in (...) かつ自分のアイテム）
+    - status_updated_at は全件で同じ時刻
+    - 同じ item_id が複数あれば後のものを採用（前のものは skipped）
+    - results に入力順で ok / not_found / invalid / skipped / error を返す
+    """
+    user_id, err_response = get_user_id_from_request(request)
+    if err_response:
+        return err_response
+
+    entries = request.data.get("actions")
+    if not isinstance(entries, list) or not entries:
+        return Response(
+            {"message": "actions は 1 件以上の配列で指定してください"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(entries) > settings.DECLUTTER_BULK_MAX_ITEMS:
+        return Response(
+            {"message": f"actions は最大 {settings.DECLUTTER_BULK_MAX_ITEMS} 件です"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    now = datetime.now(timezone.utc).isoformat()
+
+    results = []
+    # item_id → その item_id の最新の結果（同じ item_id は後勝ち）
+    latest: dict[int, dict] = {}
+
+    for entry in entries:
+        entry = entry if isinstance(entry, dict) else {}
+        action = entry.get("action")
+        result = {"item_id": entry.get("item_id"), "action": action}
+        results.append(result)
+
+        try:
+            item_id = int(entry.get("item_id"))
+        except (TypeError, ValueError):
+            result.update(status="invalid", message="item_id が不正です")
+            continue
+        result["item_id"] = item_id
+
+        if build_update_data(action, now) is None:
+            result.update(status="invalid", message="不正な action です")
+            continue
+
+        if item_id in latest:
+            latest[item_id].update(status="skipped", message="後の指定で上書きされました")
+        latest[item_id] = result
+
+    # action → item_id のリスト
+    groups: dict[str, list[int]] = {}
+    for item_id, result in latest.items():
+        if "status" not in result:
+            groups.setdefault(result["action"], []).append(item_id)
+
+    client = get_async_supabase()
+
+    def update_group(action, item_ids):
+        return (
+            client
+            .table("items")
+            .update(build_update_data(action, now))
+            .in_("item_id", item_ids)
+            .eq("user_id", user_id)
+            .neq("status", "deleted")
+            .execute()
+        )
+
+    # 失敗したグループは例外のまま受け取り、他の action のグループは続ける
+    responses = await asyncio.gather(
+        *(update_group(action, ids) for action, ids in groups.items()),
+        return_exceptions=True,
+    )
+
+    for (action, item_ids), res in zip(groups.items(), responses):
+        updated = set() if isinstance(res, Exception) else {row["item_id"] for row in res.data}
+        for item_id in item_ids:
+            result = latest[item_id]
+            if isinstance(res, Exception):
+                result.update(status="error", message=str(res))
+            elif item_id in updated:
+                result["status"] = "ok"
+            else:
+                result.update(status="not_found", message="アイテムが見つかりません")
+
+    if groups:
+        await sync_to_async(user_cache.invalidate)(user_id, *user_cache.ITEM_RESOURCES)
+
+    return Response({
+        "status": "ok",
+        "updated_at": now,
+        "updated_count": sum(1 for r in results if r["status"] == "ok"),
+        "results": results,
+    })
@@ -1,19 +1,11 @@
 # backend/api/views/item_image_batch.py
 
+from django.conf import settings
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from ..supabase_client import supabase
-
-def generate_signed_url(file_path: str, expires_in: int = 60 * 60):
-    try:
-        res = supabase.storage.from_("item_image").create_signed_url(
-            file_path, expires_in
-        )
-        return res.get("signedURL")
-    except Exception as e:
-        print("signed url error:", e)
-        return None
+from ..signed_urls import generate_image_urls
 
 
 @api_view(["POST"])
@@ -21,8 +13,11 @@ def item_image_batch(request):
     """
     複数 item_id の signed URL を一括で返す
     POST /api/items/images/
+    body: {"item_ids": [...], "size": "thumb|card|full", "format": "webp|jpg"}
     """
     item_ids = request.data.get("item_ids")
+    size = request.data.get("size") or request.GET.get("size")
+    fmt = request.data.get("format") or request.GET.get("format")
 
     if not isinstance(item_ids, list):
         return Response(
@@ -33,6 +28,15 @@ def item_image_batch(request):
     if len(item_ids) == 0:
         return Response({})
 
+    if len(item_ids) > settings.ITEM_IMAGE_BATCH_MAX_ITEMS:
+        return Response(
+            {
+                "error": f"item_ids must be at most "
+                         f"{settings.ITEM_IMAGE_BATCH_MAX_ITEMS} items"
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
     try:
         # items をまとめて取得
         res = (
@@ -43,26 +47,18 @@ def item_image_batch(request):
         )
 
         items = res.data or []
-        result: dict[str, str | None] = {}
-
-        for item in items:
-            item_id = item["item_id"]
-            image_url = item.get("image_url")
 
-            if not image_url:
-                result[str(item_id)] = None
-                continue
-
-            # public URL → file_path
-            if "/object/public/item_image/" in image_url:
-                file_path = image_url.split(
-                    "/object/public/item_image/"
-                )[-1]
-            else:
-                file_path = image_url
+        # まとめて署名（size 指定時はリサイズ版、無ければ元画像）
+        signed_urls = generate_image_urls(
+            [item["image_url"] for item in items if item.get("image_url")],
+            size,
+            fmt,
+        )
 
-            signed = generate_signed_url(file_path)
-            result[str(item_id)] = signed
+        result: dict[str, str | None] = {
+            str(item["item_id"]): signed_urls.get(item.get("image_url"))
+            for item in items
+        }
 
         # DB に存在しなかった item_id も null で埋める
         for iid in item_ids:
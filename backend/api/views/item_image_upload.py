@@ -0,0 +1,130 @@
+# backend/api/views/item_image_upload.py
+from django.conf import settings
+from django.core import signing
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from ..supabase_client import supabase
+from ..authentication import get_user_id_from_request
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "gif", "heic", "heif"}
+
+UPLOAD_TICKET_SALT = "item-image-upload"
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+# ===============================
+# 予約パスの発行 / 検証
+# ===============================
+def issue_upload_ticket(user_id: str, file_path: str) -> str:
+    return signing.dumps(
+        {"user_id": str(user_id), "path": file_path},
+        salt=UPLOAD_TICKET_SALT,
+    )
+
+
+def confirm_uploaded_image(user_id: str, file_path: str, ticket: str) -> str:
+    """
+    クライアントが直接アップロードした画像パスを確定する
+
+    - ticket がこのユーザー・このパスに対して発行されたものか
+    - 有効期限内か
+    - 実際に storage にオブジェクトがあるか
+
+    問題があれば ValueError
+    """
+    try:
+        payload = signing.loads(
+            ticket,
+            salt=UPLOAD_TICKET_SALT,
+            max_age=settings.ITEM_IMAGE_UPLOAD_TICKET_MAX_AGE,
+        )
+    except signing.BadSignature as e:
+        raise ValueError("upload_ticket が不正です") from e
+
+    if payload.get("user_id") != str(user_id) or payload.get("path") != file_path:
+        raise ValueError("upload_ticket が画像パスと一致しません")
+
+    if not supabase.storage.from_("item_image").exists(file_path):
+        raise ValueError("画像がアップロードされていません")
+
+    return file_path
+
+
+# ====================================================
+# 署名付きアップロード URL 発行
+# ====================================================
+@api_view(["POST"])
+def item_image_upload_url(request):
+    """
+    POST /api/items/image/upload-url/
+    body: {"filename": "photo.jpg", "sha256": "<画像の sha256（hex）>"}
+
+    → {"path", "exists", "signed_url", "token", "upload_ticket"}
+    パスは内容の sha256 で決まる（item/<user_id>/<sha256>.<ext>。multipart と同じ）
+    - 既に storage にある: exists=true・signed_url / token は null（アップロード不要）
+    - 無い: クライアントは signed_url に直接アップロードする
+    どちらも items 作成 / 更新時に image_path と upload_ticket を送る
+
+    sha256 はクライアントの申告なので、違う内容を上げても
+    影響するのはそのユーザー自身のパスだけ
+    """
+    user_id, err_response = get_user_id_from_request(request)
+    if err_response:
+        return err_response
+
+    filename = request.data.get("filename") or ""
+    extension = filename.split(".")[-1].lower() if "." in filename else ""
+
+    if extension not in ALLOWED_EXTENSIONS:
+        return Response(
+            {"status": "error", "message": "対応していない画像形式です"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    digest = str(request.data.get("sha256") or "").lower()
+    if not SHA256_PATTERN.match(digest):
+        return Response(
+            {"status": "error", "message": "sha256 を指定してください"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    file_path = f"item/{user_id}/{digest}.{extension}"
+    bucket = supabase.storage.from_("item_image")
+
+    try:
+        if bucket.exists(file_path):
+            return Response(
+                {
+                    "status": "success",
+                    "path": file_path,
+                    "exists": True,
+                    "signed_url": None,
+                    "token": None,
+                    "upload_ticket": issue_upload_ticket(user_id, file_path),
+                }
+            )
+
+        res = bucket.create_signed_upload_url(file_path)
+    except Exception as e:
+        logger.warning(f"signed upload url generate failed: {e}")
+        return Response(
+            {"status": "error", "message": "アップロード URL の発行に失敗しました"},
+            status=status.HTTP_502_BAD_GATEWAY,
+        )
+
+    return Response(
+        {
+            "status": "success",
+            "path": file_path,
+            "exists": False,
+            "signed_url": res["signed_url"],
+            "token": res["token"],
+            "upload_ticket": issue_upload_ticket(user_id, file_path),
+        }
+    )
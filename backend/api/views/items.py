@@ -1,43 +1,170 @@
 # backend/api/views/items.py
+from django.conf import settings
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from ..supabase_client import supabase
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
+from ..supabase_client import supabase, get_async_supabase
+from .. import user_cache
+from .. import usage_stats
+from ..etag import compute_etag, conditional_response
+from ..image_renditions import (
+    upload_renditions,
+    all_rendition_paths,
+    delete_rendition_status,
+    enqueue_renditions,
+)
+from .item_image_upload import confirm_uploaded_image
+from datetime import date
+import asyncio
 import traceback
-import uuid
+import hashlib
 import json
 
+def image_exists(file_path):
+    """
+    storage に実物があるかを毎回確認する
+    （プロセス内の記憶だけで書き込みを省くと、別 worker での削除後に
+      存在しないオブジェクトを指すアイテムができてしまう）
+    """
+    return supabase.storage.from_("item_image").exists(file_path)
+
+
 # ===============================
 # 画像アップロード関数
 # ===============================
-def upload_image_file(file, file_prefix="item"):
-    file_id = str(uuid.uuid4())
+def upload_image_file(file, user_id, file_prefix="item"):
+    """
+    画像を内容の sha256 をファイル名にして保存する
+    item/<user_id>/<sha256>.<ext>
+
+    同じユーザーが同じ画像を上げ直した場合は storage への書き込みを省略する
+    """
+    data = file.read()
+    digest = hashlib.sha256(data).hexdigest()
     extension = file.name.split('.')[-1].lower()
-    file_path = f"{file_prefix}/{file_id}.{extension}"
+    file_path = f"{file_prefix}/{user_id}/{digest}.{extension}"
+
+    if image_exists(file_path):
+        return file_path
 
     res = supabase.storage.from_("item_image").upload(
         file_path,
-        file.read(),
-        {"content-type": file.content_type}
+        data,
+        {"content-type": file.content_type, "upsert": "true"}
     )
 
     if isinstance(res, dict) and res.get("error"):
         raise ValueError(res["error"]["message"])
 
+    # thumb / card / full のリサイズ版を隣に保存
+    upload_renditions(file_path, data)
+
     return file_path
 
 
+# ===============================
+# 直接アップロード済み画像の確定
+# ===============================
+def pop_uploaded_image(data, user_id):
+    """
+    フォームから image_path / upload_ticket を取り出して確定する
+    （署名付きアップロード URL でクライアントが直接 storage に上げた画像）
+    """
+    image_path = data.pop("image_path", [None])[0]
+    upload_ticket = data.pop("upload_ticket", [None])[0]
+
+    if not image_path:
+        return None
+
+    image_path = confirm_uploaded_image(user_id, image_path, upload_ticket or "")
+
+    # thumb / card / full のリサイズ版は別プロセス（process_renditions）で作る
+    # 画像の bytes は web の worker を通らない。できるまでは元画像で表示
+    try:
+        enqueue_renditions([image_path])
+    except Exception as e:
+        print("rendition enqueue failed:", e)
+    return image_path
+
+
 # ===============================
 # 画像削除関数
 # ===============================
 def delete_image_file(file_path):
+    """
+    画像を参照しているアイテムが残っていなければ storage から削除する
+    （論理削除されたアイテムも参照として数える）
+    """
     if not file_path:
         return
 
-    res = supabase.storage.from_("item_image").remove([file_path])
+    refs = (
+        supabase.table("items")
+        .select("item_id")
+        .eq("image_url", file_path)
+        .limit(1)
+        .execute()
+    )
+    if refs.data:
+        return
+
+    res = supabase.storage.from_("item_image").remove(
+        [file_path, *all_rendition_paths(file_path)]
+    )
 
     if isinstance(res, dict) and res.get("error"):
         raise ValueError(res["error"]["message"])
 
+    delete_rendition_status(file_path)
+
+
+# ===============================
+# 一覧の select 句（fields= で絞り込み）
+# ===============================
+ITEM_LIST_COLUMNS = {
+    "item_id", "user_id", "name", "category", "subcategory_id", "storage_id",
+    "image_url", "season_tag", "tpo_tags", "color", "material", "pattern",
+    "is_favorite", "status", "status_updated_at", "price", "size", "created_at",
+}
+
+ITEM_LIST_EMBEDS = {
+    "subcategories": "subcategories:subcategory_id(name)",
+    "storages": "storages:storage_id(storage_location)",
+}
+
+ITEM_LIST_DEFAULT_SELECT = (
+    "*, subcategories:subcategory_id(name), storages:storage_id(storage_location)"
+)
+
+
+def build_item_select(fields_param):
+    """
+    fields=item_id,name,image_url,subcategories → select 句
+    未指定なら従来どおり全列。不明な列名は ValueError
+    """
+    if not fields_param:
+        return ITEM_LIST_DEFAULT_SELECT
+
+    fields = [f.strip() for f in fields_param.split(",") if f.strip()]
+    unknown = [
+        f for f in fields
+        if f not in ITEM_LIST_COLUMNS and f not in ITEM_LIST_EMBEDS
+    ]
+    if unknown:
+        raise ValueError(f"不明な fields: {', '.join(unknown)}")
+
+    # カーソルに使うので item_id は常に含める
+    columns = ["item_id"] + [
+        f for f in fields if f in ITEM_LIST_COLUMNS and f != "item_id"
+    ]
+    embeds = [ITEM_LIST_EMBEDS[f] for f in fields if f in ITEM_LIST_EMBEDS]
+    return ", ".join(columns + embeds)
+
+
+def split_param(value):
+    return [v for v in (value or "").split(",") if v]
+
 
 # ====================================================
 # アイテム一覧取得 / 新規作成
@@ -46,27 +173,77 @@ def delete_image_file(file_path):
 def items_list_create(request):
     try:
         # ---------- 認証 ----------
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
+        if not request.user.is_authenticated:
             return Response({"message": "Authorization header missing"}, status=401)
 
-        token = auth_header.split(" ")[1]
-        user = supabase.auth.get_user(token)
-        if not user or not user.user:
-            return Response({"message": "Invalid token"}, status=401)
-
-        user_id = user.user.id
+        user_id = request.user.id
 
         # ---------- GET ----------
         if request.method == "GET":
-            res = (
-                supabase.table("items")
-                .select("*, subcategories:subcategory_id(name), storages:storage_id(storage_location)")
-                .eq("user_id", user_id)
-                .neq("status", "deleted")
-                .execute()
+            params = request.GET
+
+            try:
+                select = build_item_select(params.get("fields"))
+                limit = int(params["limit"]) if params.get("limit") else None
+                cursor = int(params["cursor"]) if params.get("cursor") else None
+            except ValueError as e:
+                return Response({"message": str(e)}, status=400)
+
+            if limit is not None:
+                limit = max(1, min(limit, settings.ITEMS_PAGE_MAX_LIMIT))
+
+            def fetch():
+                query = (
+                    supabase.table("items")
+                    .select(select)
+                    .eq("user_id", user_id)
+                    .neq("status", "deleted")
+                )
+
+                # ---- 絞り込み（カンマ区切りで複数指定可）----
+                if categories := split_param(params.get("category")):
+                    query = query.in_("category", categories)
+                if statuses := split_param(params.get("status")):
+                    query = query.in_("status", statuses)
+                if storage_ids := split_param(params.get("storage_id")):
+                    query = query.in_("storage_id", storage_ids)
+                if params.get("season"):
+                    query = query.contains("season_tag", [params["season"]])
+
+                # ---- keyset ページング（新しい順）----
+                query = query.order("item_id", desc=True)
+                if cursor is not None:
+                    query = query.lt("item_id", cursor)
+                if limit is not None:
+                    query = query.limit(limit)
+
+                res = query.execute()
+
+                # 次ページがありそうならカーソルを返す
+                next_cursor = None
+                if limit is not None and len(res.data) == limit:
+                    next_cursor = str(res.data[-1]["item_id"])
+
+                return {
+                    "data": res.data,
+                    "next_cursor": next_cursor,
+                    "etag": compute_etag(res.data),
+                }
+
+            page = user_cache.get_or_set(
+                user_id,
+                user_cache.ITEMS,
+                fetch,
+                variant=request.META.get("QUERY_STRING", ""),
+            )
+
+            headers = {}
+            if page["next_cursor"]:
+                headers["X-Next-Cursor"] = page["next_cursor"]
+
+            return conditional_response(
+                request, page["data"], page["etag"], headers=headers
             )
-            return Response(res.data)
 
         # ---------- POST ----------
         data = request.POST.copy()
@@ -90,13 +267,22 @@ def items_list_create(request):
                 if data.get(f) == "":
                     data[f] = None
 
+            # 直接アップロード済み画像
+            try:
+                image_path = pop_uploaded_image(data, user_id)
+            except ValueError as e:
+                return Response({"message": str(e)}, status=400)
+
             # 画像アップロード
             if file:
-                image_path = upload_image_file(file)
+                image_path = upload_image_file(file, user_id)
+
+            if image_path:
                 data["image_url"] = image_path
 
             # DB INSERT
             inserted = supabase.table("items").insert(data).execute()
+            user_cache.invalidate(user_id, *user_cache.ITEM_RESOURCES)
             return Response(inserted.data)
 
         except Exception as e:
@@ -116,37 +302,75 @@ def items_list_create(request):
 # ====================================================
 # アイテム取得 / 更新 / 論理削除
 # ====================================================
-@api_view(["GET", "PUT", "DELETE"])
-def item_detail(request, item_id):
+def item_detail_query(user_id, item_id, client=None):
+    return (
+        (client or supabase)
+        .table("items")
+        .select(
+            "*, "
+            "subcategories:subcategory_id(name), "
+            "storages:storage_id(storage_location)"
+        )
+        .eq("item_id", item_id)
+        .eq("user_id", user_id)
+        .neq("status", "deleted")
+    )
+
+
+@async_api_view(["GET", "PUT", "DELETE"])
+async def item_detail(request, item_id):
+    """
+    GET は async（アイテムと着用統計を同時に取得）
+    PUT / DELETE は画像アップロードなど同期処理なのでスレッドで実行
+    """
+    if request.method != "GET":
+        return await sync_to_async(update_or_delete_item)(request, item_id)
+
     try:
         # ---------- 認証 ----------
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
+        if not request.user.is_authenticated:
             return Response({"message": "Authorization header missing"}, status=401)
 
-        token = auth_header.split(" ")[1]
-        user = supabase.auth.get_user(token)
-        if not user or not user.user:
-            return Response({"message": "Invalid token"}, status=401)
+        user_id = request.user.id
 
-        user_id = user.user.id
+        # ---------- アイテム + 着用統計 ----------
+        client = get_async_supabase()
+        item_res, usage_res = await asyncio.gather(
+            item_detail_query(user_id, item_id, client).execute(),
+            usage_stats.stats_query(user_id, [item_id], client).execute(),
+        )
 
-        # ---------- 対象アイテム取得 ----------
-        item_res = (
-            supabase
-            .table("items")
-            .select(
-                "*, "
-                "subcategories:subcategory_id(name), "
-                "storages:storage_id(storage_location)"
-            )
-            .eq("item_id", item_id)
-            .eq("user_id", user_id)
-            .neq("status", "deleted")
-            .execute()
+        if not item_res.data:
+            return Response({"message": "Item not found"}, status=404)
+
+        item = item_res.data[0]
+        usage = usage_stats.summarize(
+            usage_res.data[0] if usage_res.data else None
         )
+        item["wear_count"] = usage["usage_count"]
+        item["last_used_date"] = usage["last_used_date"]
+        item["first_used_date"] = usage["first_used_date"]
+        item["rolling_monthly_rate"] = usage["rolling_monthly_rate"]
+        item["monthly_counts"] = usage["monthly_counts"]
+
+        return Response(item)
+
+    except Exception as e:
+        traceback.print_exc()
+        return Response({"message": str(e)}, status=500)
 
 
+def update_or_delete_item(request, item_id):
+    try:
+        # ---------- 認証 ----------
+        if not request.user.is_authenticated:
+            return Response({"message": "Authorization header missing"}, status=401)
+
+        user_id = request.user.id
+
+        # ---------- 対象アイテム取得 ----------
+        item_res = item_detail_query(user_id, item_id).execute()
+
         if not item_res.data:
             return Response({"message": "Item not found"}, status=404)
 
@@ -166,12 +390,17 @@ def item_detail(request, item_id):
                 if data.get(f) == "":
                     data[f] = None
 
+            # 直接アップロード済み画像
+            try:
+                image_path = pop_uploaded_image(data, user_id)
+            except ValueError as e:
+                return Response({"message": str(e)}, status=400)
+
             # 画像更新
             if file:
-                if item.get("image_url"):
-                    delete_image_file(item["image_url"])
+                image_path = upload_image_file(file, user_id)
 
-                image_path = upload_image_file(file)
+            if image_path:
                 data["image_url"] = image_path
 
             updated = (
@@ -183,36 +412,24 @@ def item_detail(request, item_id):
                 .execute()
             )
 
-            return Response(updated.data)
+            user_cache.invalidate(user_id, *user_cache.ITEM_RESOURCES)
 
-        # =========================
-        # GET（詳細取得）
-        # =========================
-        if request.method == "GET":
-            usage_res = (
-                supabase
-                .table("item_usage_summary")
-                .select("usage_count, last_used_date")
-                .eq("item_id", item_id)
-                .eq("user_id", user_id)
-                .execute()
-            )
-
-            usage = usage_res.data[0] if usage_res.data else {}
-            item["wear_count"] = usage.get("usage_count", 0)
-            item["last_used_date"] = usage.get("last_used_date")
+            # 旧画像（他から参照されていなければ削除）
+            old_image = item.get("image_url")
+            if image_path and old_image and old_image != image_path:
+                delete_image_file(old_image)
 
-            return Response(item)
+            return Response(updated.data)
 
         # =========================
         # DELETE（論理削除）
         # =========================
-        if request.method == "DELETE":
-            supabase.table("items").update(
-                {"status": "deleted"}
-            ).eq("item_id", item_id).eq("user_id", user_id).execute()
+        supabase.table("items").update(
+            {"status": "deleted"}
+        ).eq("item_id", item_id).eq("user_id", user_id).execute()
+        user_cache.invalidate(user_id, *user_cache.ITEM_RESOURCES)
 
-            return Response({"message": "deleted"})
+        return Response({"message": "deleted"})
 
     except Exception as e:
         traceback.print_exc()
@@ -221,31 +438,50 @@ def item_detail(request, item_id):
 @api_view(["GET"])
 def discard_items(request):
     # 認証
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
+    if not request.user.is_authenticated:
         return Response({"message": "Authorization header missing"}, status=401)
 
-    token = auth_header.split(" ")[1]
-    user = supabase.auth.get_user(token)
-    user_id = user.user.id
+    user_id = request.user.id
 
-    res = (
-        supabase
-        .table("item_usage_summary")
-        .select("*")
-        .eq("user_id", user_id)
-        .eq("status", "discard")
-        .execute()
-    )
+    def fetch():
+        # 着用回数は item_usage_stats を埋め込みで取得（ビューの都度集計を避ける）
+        res = (
+            supabase
+            .table("items")
+            .select("*, item_usage_stats(usage_count, last_used_date)")
+            .eq("user_id", user_id)
+            .eq("status", "discard")
+            .execute()
+        )
+
+        today = date.today()
+        rows = []
+        for row in res.data or []:
+            stats = row.pop("item_usage_stats", None)
+            # 1 対 1 の埋め込みは dict、古い PostgREST では list で返る
+            if isinstance(stats, list):
+                stats = stats[0] if stats else None
+            stats = stats or {}
+
+            row["usage_count"] = stats.get("usage_count", 0)
+            row["last_used_date"] = stats.get("last_used_date")
+
+            created_at = row.get("created_at")
+            row["days_since_created"] = (
+                (today - date.fromisoformat(created_at[:10])).days
+                if created_at else None
+            )
+            rows.append(row)
+        return rows
 
-    return Response(res.data)
+    return Response(user_cache.get_or_set(user_id, user_cache.DISCARD, fetch))
 
 @api_view(["PATCH"])
 def bulk_delete_items(request):
-    auth_header = request.headers.get("Authorization")
-    token = auth_header.split(" ")[1]
-    user = supabase.auth.get_user(token)
-    user_id = user.user.id
+    if not request.user.is_authenticated:
+        return Response({"message": "Authorization header missing"}, status=401)
+
+    user_id = request.user.id
 
     item_ids = request.data.get("item_ids", [])
     if not item_ids:
@@ -255,5 +491,6 @@ def bulk_delete_items(request):
         "status": "deleted",
         "status_updated_at": "now()"
     }).in_("item_id", item_ids).eq("user_id", user_id).execute()
+    user_cache.invalidate(user_id, *user_cache.ITEM_RESOURCES)
 
     return Response({"message": "deleted", "count": len(item_ids)})
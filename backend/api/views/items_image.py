@@ -2,26 +2,22 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from ..supabase_client import supabase
+from ..signed_urls import generate_image_urls
 import logging
 
 logger = logging.getLogger(__name__)
 
-def generate_signed_url(file_path: str, expires_in: int = 60 * 60):
-    try:
-        res = supabase.storage.from_("item_image").create_signed_url(
-            file_path, expires_in
-        )
-        return res.get("signedURL")
-    except Exception as e:
-        logger.warning(f"signed url generate failed: {e}")
-        return None
-
 
 @api_view(["GET"])
 def item_image(request, item_id: int):
     """
-    GET /api/items/<item_id>/image/
+    GET /api/items/<item_id>/image/?size=thumb|card|full&format=webp|jpg
+
+    size 未指定なら元画像
     """
+    size = request.GET.get("size")
+    fmt = request.GET.get("format")
+
     # ❶ image_url 取得
     try:
         item_res = (
@@ -42,13 +38,7 @@ def item_image(request, item_id: int):
     if not image_url:
         return Response({"url": None})
 
-    # ❷ file_path 解決
-    if "/object/public/item_image/" in image_url:
-        file_path = image_url.split("/object/public/item_image/")[-1]
-    else:
-        file_path = image_url
-
-    # ❸ signed URL 生成
-    signed_url = generate_signed_url(file_path)
+    # ❷ signed URL 生成（リサイズ版が無ければ元画像。無いことはキャッシュする）
+    signed_url = generate_image_urls([image_url], size, fmt).get(image_url)
 
     return Response({"url": signed_url})
@@ -2,24 +2,11 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from ..supabase_client import supabase
+from ..authentication import get_user_id_from_request
+from .. import user_cache
+from ..etag import compute_etag, with_etag, conditional_response
 import traceback
 
-# ==========================
-# JWT → user_id 抽出共通処理
-# ==========================
-def get_user_id_from_request(request):
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return None, Response({"status": "error", "message": "Authorization header missing"}, status=401)
-
-    token = auth_header.split(" ")[1]
-    user = supabase.auth.get_user(token)
-    if not user or not user.user:
-        return None, Response({"status": "error", "message": "Invalid token"}, status=401)
-
-    return user.user.id, None
-
-
 # ----------------------------------------------------
 # 収納場所（storages）一覧取得 / 新規作成
 # ----------------------------------------------------
@@ -32,7 +19,11 @@ def storages_list_create(request):
     try:
         if request.method == 'GET':
             response = supabase.table("storages").select("*").eq("user_id", user_id).execute()
-            return Response({"status": "success", "data": response.data})
+            return conditional_response(
+                request,
+                {"status": "success", "data": response.data},
+                compute_etag(response.data),
+            )
 
         elif request.method == 'POST':
             data = request.data.copy()
@@ -42,6 +33,7 @@ def storages_list_create(request):
                 return Response({"status": "error", "message": "storage_location が必要"}, status=400)
 
             inserted = supabase.table("storages").insert(data).execute()
+            user_cache.invalidate(user_id, user_cache.STORAGES)
             return Response({"status": "success", "data": inserted.data})
 
     except Exception as e:
@@ -84,6 +76,8 @@ def storage_detail(request, storage_id):
                 .eq("user_id", user_id)
                 .execute()
             )
+            # items 一覧も storage_location を埋め込んでいる
+            user_cache.invalidate(user_id, user_cache.STORAGES, user_cache.ITEMS)
             return Response({"status": "success", "data": updated.data})
 
         elif request.method == 'DELETE':
@@ -92,6 +86,7 @@ def storage_detail(request, storage_id):
                 .eq("storage_id", storage_id) \
                 .eq("user_id", user_id) \
                 .execute()
+            user_cache.invalidate(user_id, user_cache.STORAGES, user_cache.ITEMS)
             return Response({"status": "success", "message": "Storage deleted"})
 
     except Exception as e:
@@ -105,7 +100,7 @@ def storages_with_items(request):
     if err:
         return err
 
-    try:
+    def fetch():
         res = (
             supabase
             .table("storages")
@@ -130,7 +125,17 @@ def storages_with_items(request):
                 if item["status"] != "deleted"
             ]
 
-        return Response({"status": "success", "data": res.data})
+        return res.data
+
+    try:
+        cached = user_cache.get_or_set(
+            user_id, user_cache.STORAGES, lambda: with_etag(fetch())
+        )
+        return conditional_response(
+            request,
+            {"status": "success", "data": cached["data"]},
+            cached["etag"],
+        )
 
     except Exception as e:
         traceback.print_exc()
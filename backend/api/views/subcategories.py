@@ -1,7 +1,9 @@
 # backend/api/views/subcategories.py
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from ..supabase_client import supabase
+from django.conf import settings
+from ..etag import compute_etag, conditional_response
+from ..subcategory_table import subcategory_table
 import traceback
 
 # ====================================================
@@ -12,13 +14,17 @@ def subcategories_list(request):
     try:
         category = request.GET.get("category")
 
-        query = supabase.table("subcategories").select("*")
-        if category:
-            query = query.eq("category", category)
+        # プロセス内の参照テーブルから返す（DB へは TTL ごとに 1 回）
+        data = subcategory_table.all(category)
 
-        response = query.execute()
-
-        return Response({"status": "success", "data": response.data})
+        return conditional_response(
+            request,
+            {"status": "success", "data": data},
+            compute_etag(data),
+            headers={
+                "Cache-Control": f"public, max-age={settings.SUBCATEGORY_CACHE_MAX_AGE}"
+            },
+        )
 
     except Exception as e:
         print("subcategories_list error:", e)
@@ -1,31 +1,47 @@
 # backend/api/views/usage_history.py
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from django.conf import settings
 from ..supabase_client import supabase
+from ..authentication import get_user_id_from_request
+from .. import user_cache
+from ..etag import compute_etag, conditional_response
+from ..signed_urls import generate_image_urls
+from .items import ITEM_LIST_COLUMNS
 import traceback
 
-# ==========================
-# JWT → user_id 抽出共通処理
-# ==========================
-def get_user_id_from_request(request):
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return None, Response(
-            {"status": "error", "message": "Authorization header missing"},
-            status=401
-        )
+# =====================================================
+# 一覧用ヘルパー
+# =====================================================
+USAGE_ITEM_DEFAULT_FIELDS = "item_id, name, category, image_url"
 
-    token = auth_header.split(" ")[1]
-    user = supabase.auth.get_user(token)
 
-    if not user or not user.user:
-        return None, Response(
-            {"status": "error", "message": "Invalid token"},
-            status=401
-        )
+def build_usage_item_select(fields_param):
+    """
+    item_fields=name,color → items!inner(...) の中身
+    未指定なら一覧表示に必要な最小限の列
+    """
+    if not fields_param:
+        return USAGE_ITEM_DEFAULT_FIELDS
+
+    fields = [f.strip() for f in fields_param.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in ITEM_LIST_COLUMNS]
+    if unknown:
+        raise ValueError(f"不明な item_fields: {', '.join(unknown)}")
+
+    return ", ".join(["item_id"] + [f for f in fields if f != "item_id"])
+
 
-    return user.user.id, None
+def parse_usage_cursor(cursor):
+    """
+    "2025-01-31_123" → ("2025-01-31", 123)
+    """
+    if not cursor:
+        return None
+
+    used_date, _, history_id = cursor.partition("_")
+    return date.fromisoformat(used_date).isoformat(), int(history_id)
 
 
 # =====================================================
@@ -41,16 +57,70 @@ def usage_list_create(request):
     # GET: 自分の items に紐づく usage_history 全部
     # -------------------------------------------
     if request.method == 'GET':
+        params = request.GET
+
         try:
-            response = (
+            item_select = build_usage_item_select(params.get("item_fields"))
+            limit = int(params.get("limit") or settings.USAGE_PAGE_DEFAULT_LIMIT)
+            cursor = parse_usage_cursor(params.get("cursor"))
+            date_from = params.get("from")
+            date_to = params.get("to")
+            if date_from:
+                date.fromisoformat(date_from)
+            if date_to:
+                date.fromisoformat(date_to)
+        except ValueError as e:
+            return Response(
+                {"status": "error", "message": str(e)},
+                status=400
+            )
+
+        limit = max(1, min(limit, settings.USAGE_PAGE_MAX_LIMIT))
+
+        try:
+            query = (
                 supabase
                 .table("usage_history")
-                .select("*, items!inner(*)")
+                .select(f"*, items!inner({item_select})")
                 .eq("items.user_id", user_id)
+            )
+
+            # ---- 絞り込み ----
+            if date_from:
+                query = query.gte("used_date", date_from)
+            if date_to:
+                query = query.lte("used_date", date_to)
+            if item_ids := [v for v in params.get("item_id", "").split(",") if v]:
+                query = query.in_("item_id", item_ids)
+            if params.get("weather"):
+                query = query.eq("weather", params["weather"])
+
+            # ---- keyset ページング（used_date, history_id の新しい順）----
+            if cursor:
+                used_date, history_id = cursor
+                query = query.or_(
+                    f"used_date.lt.{used_date},"
+                    f"and(used_date.eq.{used_date},history_id.lt.{history_id})"
+                )
+
+            response = (
+                query
+                .order("used_date", desc=True)
+                .order("history_id", desc=True)
+                .limit(limit)
                 .execute()
             )
 
-            return Response({"status": "success", "data": response.data})
+            next_cursor = None
+            if len(response.data) == limit:
+                last = response.data[-1]
+                next_cursor = f"{last['used_date']}_{last['history_id']}"
+
+            return Response({
+                "status": "success",
+                "data": response.data,
+                "next_cursor": next_cursor,
+            })
 
         except Exception as e:
             print("usage_list_create GET エラー:", e)
@@ -114,7 +184,9 @@ def usage_list_create(request):
             )
 
             # ★ ここで status を触らない ★
-            # → trigger が自動で active に戻す
+            # → trigger が自動で active に戻す（なので items 系のキャッシュは破棄）
+            # item_usage_stats（着用統計）も trigger が差分更新する
+            user_cache.invalidate(user_id, *user_cache.ITEM_RESOURCES)
 
             return Response(
                 {"status": "success", "data": inserted.data}
@@ -167,6 +239,7 @@ def usage_detail(request, history_id):
                 .eq("history_id", history_id)
                 .execute()
             )
+            user_cache.invalidate(user_id, *user_cache.ITEM_RESOURCES)
 
             return Response({"status": "success", "data": updated.data})
 
@@ -176,6 +249,7 @@ def usage_detail(request, history_id):
                 .delete()\
                 .eq("history_id", history_id)\
                 .execute()
+            user_cache.invalidate(user_id, *user_cache.ITEM_RESOURCES)
 
             return Response(
                 {"status": "success", "message": "Usage deleted"}
@@ -191,14 +265,17 @@ def usage_detail(request, history_id):
 
 
 # =====================================================
-# 日付で取得（JOIN + user_id チェック）
+# 日付で取得（JOIN + user_id チェック） / 日付の服装を置き換え
 # =====================================================
-@api_view(['GET'])
+@api_view(['GET', 'PUT'])
 def usage_by_date(request, date_str):
     user_id, error = get_user_id_from_request(request)
     if error:
         return error
 
+    if request.method == 'PUT':
+        return replace_usage_for_date(request, user_id, date_str)
+
     try:
         response = (
             supabase
@@ -209,7 +286,11 @@ def usage_by_date(request, date_str):
             .execute()
         )
 
-        return Response({"status": "success", "data": response.data})
+        return conditional_response(
+            request,
+            {"status": "success", "data": response.data},
+            compute_etag(response.data),
+        )
 
     except Exception as e:
         print("usage_by_date エラー:", e)
@@ -218,3 +299,201 @@ def usage_by_date(request, date_str):
             {"status": "error", "message": str(e)},
             status=500
         )
+
+
+def replace_usage_for_date(request, user_id, date_str):
+    """
+    PUT /api/usage_history/date/<date>/
+    body: {"item_ids": [...]}
+
+    その日の使用履歴（自分のアイテム分）を item_ids で置き換える
+    backend を通すので断捨離候補などのキャッシュもここで破棄される
+    """
+    try:
+        used_date = date.fromisoformat(date_str).isoformat()
+    except ValueError:
+        return Response(
+            {"status": "error", "message": "日付は YYYY-MM-DD で指定してください"},
+            status=400
+        )
+
+    item_ids = request.data.get("item_ids")
+    if not item_ids or not isinstance(item_ids, list):
+        return Response(
+            {"status": "error", "message": "item_ids は配列で指定してください"},
+            status=400
+        )
+
+    try:
+        # ---- item_id の所有チェック ----
+        owned_items = (
+            supabase
+            .table("items")
+            .select("item_id")
+            .eq("user_id", user_id)
+            .execute()
+        )
+        owned_ids = {item["item_id"] for item in owned_items.data}
+
+        for item_id in item_ids:
+            if item_id not in owned_ids:
+                return Response(
+                    {
+                        "status": "error",
+                        "message": f"item_id {item_id} はこのユーザーのアイテムではありません"
+                    },
+                    status=403
+                )
+
+        # ---- 自分のアイテムの分だけ消して入れ直す ----
+        supabase.table("usage_history")\
+            .delete()\
+            .eq("used_date", used_date)\
+            .in_("item_id", list(owned_ids))\
+            .execute()
+
+        inserted = (
+            supabase
+            .table("usage_history")
+            .insert([
+                {"item_id": item_id, "used_date": used_date}
+                for item_id in dict.fromkeys(item_ids)
+            ])
+            .execute()
+        )
+        user_cache.invalidate(user_id, *user_cache.ITEM_RESOURCES)
+
+        return Response({"status": "success", "data": inserted.data})
+
+    except Exception as e:
+        print("usage_by_date PUT エラー:", e)
+        traceback.print_exc()
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=500
+        )
+
+
+# =====================================================
+# 期間で取得（カレンダー用: 日付ごと + アイテム辞書）
+# =====================================================
+@api_view(['GET'])
+def usage_by_range(request):
+    """
+    GET /api/usage_history/range/?from=2025-01-01&to=2025-01-31[&compact=1]
+
+    {
+      "days":  {"2025-01-03": [{history_id, item_id, weather, temperature}, ...]},
+      "items": {"12": {...item}}   # 重複なし
+    }
+    compact=1 のときは days が item_id の配列、items は thumbnail_url のみ
+    """
+    user_id, error = get_user_id_from_request(request)
+    if error:
+        return error
+
+    try:
+        date_from = date.fromisoformat(request.GET.get("from", ""))
+        date_to = date.fromisoformat(request.GET.get("to", ""))
+    except ValueError:
+        return Response(
+            {"status": "error", "message": "from / to は YYYY-MM-DD で指定してください"},
+            status=400
+        )
+
+    if date_from > date_to:
+        return Response(
+            {"status": "error", "message": "from は to 以前の日付にしてください"},
+            status=400
+        )
+
+    if (date_to - date_from).days >= settings.USAGE_RANGE_MAX_DAYS:
+        return Response(
+            {
+                "status": "error",
+                "message": f"期間は {settings.USAGE_RANGE_MAX_DAYS} 日以内にしてください"
+            },
+            status=400
+        )
+
+    compact = request.GET.get("compact") in ("1", "true")
+
+    try:
+        item_select = "item_id, image_url" if compact else "*"
+
+        def build_query():
+            return (
+                supabase
+                .table("usage_history")
+                .select(
+                    "history_id, item_id, used_date, weather, temperature, "
+                    f"items!inner({item_select})"
+                )
+                .eq("items.user_id", user_id)
+                .gte("used_date", date_from.isoformat())
+                .lte("used_date", date_to.isoformat())
+                .order("used_date")
+                .order("history_id")
+            )
+
+        days: dict[str, list] = {}
+        items: dict[str, dict] = {}
+
+        for row in fetch_all_pages(build_query):
+            item = row.pop("items")
+            items.setdefault(str(row["item_id"]), item)
+
+            if compact:
+                days.setdefault(row["used_date"], []).append(row["item_id"])
+            else:
+                days.setdefault(row["used_date"], []).append(row)
+
+        if compact:
+            items = compact_items_with_thumbnails(items)
+
+        data = {"days": days, "items": items}
+
+        return conditional_response(
+            request,
+            {"status": "success", "data": data},
+            compute_etag(data),
+        )
+
+    except Exception as e:
+        print("usage_by_range エラー:", e)
+        traceback.print_exc()
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=500
+        )
+
+
+def fetch_all_pages(build_query, page_size: int | None = None) -> list[dict]:
+    """
+    PostgREST の max-rows（既定 1000 件）で黙って切られないよう、
+    .range() で 1 ページずつ最後まで取得する
+
+    build_query: 順序を固定したクエリを毎回新しく作る関数
+    （.range() は builder 自体を書き換えるので使い回せない）
+    """
+    page_size = page_size or settings.USAGE_RANGE_PAGE_SIZE
+    rows: list[dict] = []
+    while True:
+        page = build_query().range(len(rows), len(rows) + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+
+def compact_items_with_thumbnails(items: dict[str, dict]) -> dict[str, dict]:
+    """
+    item_id → {"thumbnail_url"}（thumb サイズを一括署名・無ければ元画像）
+    """
+    signed = generate_image_urls(
+        [item["image_url"] for item in items.values() if item.get("image_url")],
+        "thumb",
+    )
+    return {
+        item_id: {"thumbnail_url": signed.get(item.get("image_url"))}
+        for item_id, item in items.items()
+    }
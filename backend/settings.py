@@ -17,6 +17,10 @@ from dotenv import load_dotenv
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# .env は CACHES などで os.getenv する前に読み込む
+dotenv_path = os.path.join(BASE_DIR, '.env')
+load_dotenv(dotenv_path)
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -44,6 +48,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
 
     "rest_framework",
+    "adrf",
     "corsheaders",
     "backend.api",
 ]
@@ -90,6 +95,43 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "DJANGO_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", ""),
+    },
+    # AI 解析結果の永続キャッシュ（sqlite）
+    # 初回のみ: python manage.py createcachetable
+    "ai_analysis": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "ai_analysis_cache",
+        "TIMEOUT": int(os.getenv("AI_ANALYSIS_CACHE_TTL", str(60 * 60 * 24 * 30))),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("AI_ANALYSIS_CACHE_SIZE", "5000")),
+        },
+    },
+    # ユーザー単位の一覧キャッシュを worker 間で共有する場合の置き場所
+    # USER_CACHE_BACKEND=django で使う。DB の場合は初回のみ: python manage.py createcachetable
+    # （redis などに差し替え可）
+    "user_cache": {
+        "BACKEND": os.getenv(
+            "USER_CACHE_DJANGO_BACKEND",
+            "django.core.cache.backends.db.DatabaseCache",
+        ),
+        "LOCATION": os.getenv("USER_CACHE_LOCATION", "user_cache"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("USER_CACHE_SIZE", "5000")),
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -137,6 +179,9 @@ CORS_ALLOW_ALL_ORIGINS = True  # 開発時はすべて許可
 
 CORS_ALLOW_CREDENTIALS = True
 
+# フロントから読むレスポンスヘッダー
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor", "ETag"]
+
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
@@ -146,17 +191,113 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'backend.api.authentication.SupabaseJWTAuthentication',
+    ],
 }
 
 # MEDIA_ROOT と MEDIA_URL を追加
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-dotenv_path = os.path.join(BASE_DIR, '.env')
-load_dotenv(dotenv_path)
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
+# Supabase Auth（JWT ローカル検証）
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_AUTH_CACHE_SIZE = int(os.getenv("SUPABASE_AUTH_CACHE_SIZE", "4096"))
+
+# アイテム一覧の 1 ページ最大件数
+ITEMS_PAGE_MAX_LIMIT = int(os.getenv("ITEMS_PAGE_MAX_LIMIT", "200"))
+
+# ユーザー単位の一覧キャッシュ（items / coordinations / storages / discard / declutter）
+# backend: "local"（プロセス内 LRU・worker 1 つのときだけ）/ "django"（CACHES を worker 間で共有）
+# WEB_CONCURRENCY > 1 で local のままだと起動時にエラー（user_cache._check_shared_backend）
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "local")
+USER_CACHE_ALIAS = os.getenv("USER_CACHE_ALIAS", "user_cache")
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "120"))
+USER_CACHE_VERSION_TTL = int(os.getenv("USER_CACHE_VERSION_TTL", str(60 * 60 * 24)))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "5000"))
+USER_CACHE_MAX_BYTES = int(os.getenv("USER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# subcategories 参照テーブル（プロセス内の再読み込み間隔 / ブラウザの max-age・秒）
+SUBCATEGORY_CACHE_TTL = int(os.getenv("SUBCATEGORY_CACHE_TTL", str(60 * 60)))
+SUBCATEGORY_CACHE_MAX_AGE = int(os.getenv("SUBCATEGORY_CACHE_MAX_AGE", str(60 * 60 * 24)))
+# 読み込みに失敗したら、この秒数は再読み込みしない
+SUBCATEGORY_RETRY_AFTER = int(os.getenv("SUBCATEGORY_RETRY_AFTER", "30"))
+
+# コーデ一覧（アイテム埋め込み）の 1 ページ件数（既定 / 最大）
+COORDINATIONS_PAGE_DEFAULT_LIMIT = int(os.getenv("COORDINATIONS_PAGE_DEFAULT_LIMIT", "50"))
+COORDINATIONS_PAGE_MAX_LIMIT = int(os.getenv("COORDINATIONS_PAGE_MAX_LIMIT", "200"))
+
+# 使用履歴一覧の 1 ページ件数（既定 / 最大）
+USAGE_PAGE_DEFAULT_LIMIT = int(os.getenv("USAGE_PAGE_DEFAULT_LIMIT", "100"))
+USAGE_PAGE_MAX_LIMIT = int(os.getenv("USAGE_PAGE_MAX_LIMIT", "500"))
+
+# 使用履歴の期間取得で指定できる最大日数
+USAGE_RANGE_MAX_DAYS = int(os.getenv("USAGE_RANGE_MAX_DAYS", "366"))
+# 1 回の取得件数（PostgREST の max-rows 以下にする）
+USAGE_RANGE_PAGE_SIZE = int(os.getenv("USAGE_RANGE_PAGE_SIZE", "1000"))
+
+# 断捨離候補の limit（上位 K 件）の上限
+DECLUTTER_CANDIDATES_MAX_LIMIT = int(os.getenv("DECLUTTER_CANDIDATES_MAX_LIMIT", "200"))
+
+# 保留（pending）にしたアイテムを候補に出さない日数（クールダウン）
+DECLUTTER_COOLDOWN_DAYS = int(os.getenv("DECLUTTER_COOLDOWN_DAYS", "30"))
+
+# 断捨離アクションの一括適用で 1 回に送れる件数
+DECLUTTER_BULK_MAX_ITEMS = int(os.getenv("DECLUTTER_BULK_MAX_ITEMS", "200"))
+
+# 断捨離候補のキャッシュ期間（秒）。日付・季節が変わればキーが変わる
+DECLUTTER_CACHE_TTL = int(os.getenv("DECLUTTER_CACHE_TTL", str(60 * 60 * 6)))
+
+# 署名付き URL（item_image_batch）
+ITEM_IMAGE_BATCH_MAX_ITEMS = int(os.getenv("ITEM_IMAGE_BATCH_MAX_ITEMS", "500"))
+ITEM_IMAGE_SIGN_CHUNK_SIZE = int(os.getenv("ITEM_IMAGE_SIGN_CHUNK_SIZE", "100"))
+ITEM_IMAGE_SIGN_CONCURRENCY = int(os.getenv("ITEM_IMAGE_SIGN_CONCURRENCY", "8"))
+
+# 署名付きアップロード URL（予約パスの有効期限・秒）
+ITEM_IMAGE_UPLOAD_TICKET_MAX_AGE = int(os.getenv("ITEM_IMAGE_UPLOAD_TICKET_MAX_AGE", "3600"))
+# リサイズ版の作成済み / 失敗をプロセス内に覚えておく期間（秒）
+RENDITION_STATUS_CACHE_TTL = int(os.getenv("RENDITION_STATUS_CACHE_TTL", str(60 * 60)))
+
+# 署名付き URL キャッシュ
+# backend: "local"（プロセス内 LRU）/ "django"（CACHES を worker 間で共有）
+SIGNED_URL_EXPIRES_IN = int(os.getenv("SIGNED_URL_EXPIRES_IN", "3600"))
+SIGNED_URL_REFRESH_RATIO = float(os.getenv("SIGNED_URL_REFRESH_RATIO", "0.5"))
+SIGNED_URL_CACHE_BACKEND = os.getenv("SIGNED_URL_CACHE_BACKEND", "local")
+SIGNED_URL_CACHE_ALIAS = os.getenv("SIGNED_URL_CACHE_ALIAS", "default")
+SIGNED_URL_CACHE_SIZE = int(os.getenv("SIGNED_URL_CACHE_SIZE", "10000"))
+SIGNED_URL_CACHE_MAX_BYTES = int(os.getenv("SIGNED_URL_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
 # AI Image Analysis
 AI_IMAGE_ANALYSIS_API_URL = os.getenv("AI_IMAGE_ANALYSIS_API_URL")
 AI_IMAGE_ANALYSIS_TIMEOUT = int(os.getenv("AI_IMAGE_ANALYSIS_TIMEOUT"))
+
+# AI API 用 HTTP クライアント（keep-alive プール）
+AI_IMAGE_ANALYSIS_CONNECT_TIMEOUT = float(os.getenv("AI_IMAGE_ANALYSIS_CONNECT_TIMEOUT", "5"))
+AI_HTTP_POOL_SIZE = int(os.getenv("AI_HTTP_POOL_SIZE", "10"))
+AI_HTTP_KEEPALIVE = int(os.getenv("AI_HTTP_KEEPALIVE", "10"))
+AI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("AI_HTTP_KEEPALIVE_EXPIRY", "60"))
+AI_HTTP2 = os.getenv("AI_HTTP2", "true").lower() == "true"
+
+# AI 一括解析（同時に AI API へ送る数 / 1 リクエストの最大枚数）
+AI_IMAGE_ANALYSIS_BATCH_CONCURRENCY = int(os.getenv("AI_IMAGE_ANALYSIS_BATCH_CONCURRENCY", "4"))
+AI_IMAGE_ANALYSIS_BATCH_MAX_FILES = int(os.getenv("AI_IMAGE_ANALYSIS_BATCH_MAX_FILES", "50"))
+# 1 枚あたりの締め切り（解析開始から。httpx の timeout は操作ごとなので合計はこちらで切る）
+AI_IMAGE_ANALYSIS_BATCH_ITEM_DEADLINE = float(os.getenv(
+    "AI_IMAGE_ANALYSIS_BATCH_ITEM_DEADLINE",
+    str(AI_IMAGE_ANALYSIS_TIMEOUT + AI_IMAGE_ANALYSIS_CONNECT_TIMEOUT),
+))
+
+# AI API に送る前の縮小（長辺 px / JPEG 品質）
+AI_IMAGE_MAX_EDGE = int(os.getenv("AI_IMAGE_MAX_EDGE", "1024"))
+AI_IMAGE_JPEG_QUALITY = int(os.getenv("AI_IMAGE_JPEG_QUALITY", "85"))
+
+# AI 解析結果キャッシュ
+# backend: "local"（プロセス内 LRU）/ "django"（CACHES["ai_analysis"] = sqlite に永続化）
+AI_ANALYSIS_CACHE_BACKEND = os.getenv("AI_ANALYSIS_CACHE_BACKEND", "local")
+AI_ANALYSIS_CACHE_ALIAS = os.getenv("AI_ANALYSIS_CACHE_ALIAS", "ai_analysis")
+AI_ANALYSIS_CACHE_TTL = int(os.getenv("AI_ANALYSIS_CACHE_TTL", str(60 * 60 * 24 * 30)))
+AI_ANALYSIS_CACHE_SIZE = int(os.getenv("AI_ANALYSIS_CACHE_SIZE", "5000"))
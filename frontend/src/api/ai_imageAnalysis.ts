@@ -67,3 +67,33 @@ export async function analyzeImage(
 
     return json.result as AiImageAnalysisResult;
 }
+
+
+/**
+ * 複数画像の一括解析API
+ * 送った順に 1 件ずつ結果を返す（失敗した画像は result が null）
+ */
+export async function analyzeImagesBatch(
+    files: File[]
+): Promise<(AiImageAnalysisResult | null)[]> {
+    const headers = await authHeaders();
+
+    const form = new FormData();
+    files.forEach((file) => form.append("files", file));
+
+    const res = await fetch(`${API_BASE}/ai_image_analysis/preview/batch/`, {
+        method: "POST",
+        headers,
+        body: form,
+    });
+
+    if (!res.ok) {
+        throw new Error(await res.text());
+    }
+
+    const json = await res.json();
+
+    return json.results.map((r: { status: string; result?: AiImageAnalysisResult }) =>
+        r.status === "success" ? (r.result as AiImageAnalysisResult) : null
+    );
+}
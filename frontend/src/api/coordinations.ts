@@ -53,6 +53,29 @@ export async function getCoordinations() {
     return res.json();
 }
 
+// ===========================
+// 一覧取得（アイテム・サムネイル付き）
+// ===========================
+export async function getCoordinationsWithItems(params: {
+    limit?: number;
+    cursor?: string | null;
+    thumbnails?: boolean;
+} = {}) {
+    const headers = await authHeaders();
+    const query = new URLSearchParams();
+    if (params.limit) query.set("limit", String(params.limit));
+    if (params.cursor) query.set("cursor", params.cursor);
+    if (params.thumbnails) query.set("thumbnails", "1");
+
+    const res = await fetch(
+        `${API_BASE}/coordinations/with_items/?${query.toString()}`,
+        { headers }
+    );
+
+    if (!res.ok) throw new Error("コーディネート取得に失敗しました");
+    return res.json();
+}
+
 // ===========================
 // 詳細取得
 // ===========================
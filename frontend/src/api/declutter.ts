@@ -28,7 +28,8 @@ export type DeclutterItem = {
 export type DeclutterAction =
     | "pending"
     | "favorite"
-    | "discard";
+    | "discard"
+    | "restore";
 
 /* =========================
    断捨離候補取得
@@ -58,7 +59,9 @@ export async function getDeclutterCandidates(): Promise<DeclutterItem[]> {
         throw new Error("断捨離候補の取得に失敗しました: " + text);
     }
 
-    return res.json();
+    // { data, cached_at, cache_age }（cache_age: 何秒前に計算した結果か）
+    const json = await res.json();
+    return json.data;
 }
 
 /* =========================
@@ -98,3 +101,46 @@ export async function updateDeclutterAction(
     }
 }
 
+
+/* =========================
+   断捨離アクション（一括）
+========================= */
+
+export type DeclutterActionResult = {
+    item_id: number;
+    action: DeclutterAction;
+    status: "ok" | "not_found" | "invalid" | "skipped" | "error";
+    message?: string;
+};
+
+export async function updateDeclutterActions(
+    actions: { item_id: number; action: DeclutterAction }[]
+): Promise<DeclutterActionResult[]> {
+    const {
+        data: { session },
+    } = await supabase.auth.getSession();
+
+    if (!session?.access_token) {
+        throw new Error("ログインが必要です");
+    }
+
+    const res = await fetch(
+        `${API_BASE}/items/declutter/action/bulk/`,
+        {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+                Authorization: `Bearer ${session.access_token}`,
+            },
+            body: JSON.stringify({ actions }),
+        }
+    );
+
+    if (!res.ok) {
+        const text = await res.text();
+        throw new Error(text);
+    }
+
+    const json = await res.json();
+    return json.results;
+}
@@ -16,6 +16,44 @@ async function authHeaders() {
     };
 }
 
+// ===========================
+// 画像を storage に直接アップロード
+// ===========================
+// ① 画像の sha256 を計算し、backend で予約パス（内容で決まる）を発行
+// ② 既に同じ画像があれば PUT しない。無ければ storage に直接 PUT（Django を経由しない）
+// ③ items 作成 / 更新時に image_path + upload_ticket を送る
+async function sha256Hex(file: File) {
+    const digest = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest))
+        .map((b) => b.toString(16).padStart(2, "0"))
+        .join("");
+}
+
+async function uploadItemImage(file: File) {
+    const [headers, sha256] = await Promise.all([authHeaders(), sha256Hex(file)]);
+    const res = await fetch(`${API_BASE}/items/image/upload-url/`, {
+        method: "POST",
+        headers: {
+            ...headers,
+            "Content-Type": "application/json",
+        },
+        body: JSON.stringify({ filename: file.name, sha256 }),
+    });
+    if (!res.ok) throw new Error("Failed to get upload URL");
+
+    const { path, exists, token, upload_ticket } = await res.json();
+
+    if (!exists) {
+        const { error } = await supabase.storage
+            .from("item_image")
+            .uploadToSignedUrl(path, token, file, { contentType: file.type });
+        // 同じ画像の同時アップロードで先を越された場合は、そのオブジェクトを使う
+        if (error && !/exists|duplicate/i.test(error.message)) throw error;
+    }
+
+    return { path: path as string, upload_ticket: upload_ticket as string };
+}
+
 // ===========================
 // 全アイテム取得
 // ===========================
@@ -45,7 +83,9 @@ export async function createItem(values: ItemFormValues) {
     form.append("is_favorite", String(values.is_favorite));
 
     if (values.image_file) {
-        form.append("image", values.image_file);
+        const { path, upload_ticket } = await uploadItemImage(values.image_file);
+        form.append("image_path", path);
+        form.append("upload_ticket", upload_ticket);
     }
 
     const res = await fetch(`${API_BASE}/items/`, {
@@ -81,7 +121,9 @@ export async function updateItem(item_id: number, values: ItemFormValues) {
     form.append("is_favorite", String(values.is_favorite));
 
     if (values.image_file) {
-        form.append("image", values.image_file);
+        const { path, upload_ticket } = await uploadItemImage(values.image_file);
+        form.append("image_path", path);
+        form.append("upload_ticket", upload_ticket);
     }
 
     const res = await fetch(`${API_BASE}/items/${item_id}/`, {
@@ -168,8 +210,17 @@ export async function bulkDeleteItems(itemIds: number[]) {
 }
 
 export async function cancelDiscard(itemId: number) {
-    return supabase
-        .from("items")
-        .update({ status: "active" })
-        .eq("item_id", itemId);
+    // backend 経由で更新する（一覧キャッシュを無効化するため）
+    const headers = await authHeaders();
+    const res = await fetch(`${API_BASE}/items/declutter/action/`, {
+        method: "POST",
+        headers: {
+            ...headers,
+            "Content-Type": "application/json",
+        },
+        body: JSON.stringify({ item_id: itemId, action: "restore" }),
+    });
+
+    if (!res.ok) throw new Error("Failed to cancel discard");
+    return res.json();
 }
@@ -90,3 +90,31 @@ export async function getUsageByDate(date: string) {
         throw e;
     }
 }
+
+// ===========================
+// 日付の服装を置き換え
+// ===========================
+export async function replaceUsageForDate(date: string, itemIds: number[]) {
+    const headers = await authHeaders();
+    const res = await fetch(`${API_BASE}/usage_history/date/${date}/`, {
+        method: "PUT",
+        headers,
+        body: JSON.stringify({ item_ids: itemIds }),
+    });
+    if (!res.ok) throw new Error("服装の登録に失敗しました");
+    return res.json();
+}
+
+// ===========================
+// 期間で取得（カレンダー用）
+// compact=true のときは days が item_id 配列、items はサムネイル URL のみ
+// ===========================
+export async function getUsageByRange(from: string, to: string, compact = false) {
+    const headers = await authHeaders();
+    const params = new URLSearchParams({ from, to });
+    if (compact) params.set("compact", "1");
+
+    const res = await fetch(`${API_BASE}/usage_history/range/?${params}`, { headers });
+    if (!res.ok) throw new Error("期間で使用履歴取得に失敗しました");
+    return res.json();
+}
@@ -5,15 +5,10 @@ import { useNavigate } from "react-router-dom";
 import toast from "react-hot-toast";
 
 import { createCoordination, updateCoordination } from "../api/coordinations";
-import {
-    addItemToCoordination,
-    removeItemFromCoordination,
-    getAllCoordinationItems,
-} from "../api/coordination_items";
 
 import { Button } from "./ui/Button";
 
-import type { Item, Coordination, CoordinationItem } from "../types";
+import type { Item, Coordination } from "../types";
 
 export interface CoordinationFormData {
     name: string;
@@ -67,49 +62,13 @@ const CoordinationForm: FC<Props> = ({
             if (coordination) {
                 const coordinationId = coordination.coordination_id;
 
-                // ① coordination 本体更新
+                // 本体と中間テーブル（差分のみ）を backend がまとめて更新
                 await updateCoordination(coordinationId, {
                     name: form.name,
                     is_favorite: form.is_favorite,
                     items: selectedItems.map((i) => i.item_id),
                 });
 
-                // ② 既存アイテム取得
-                const ciRes = await getAllCoordinationItems();
-                const allCI: CoordinationItem[] = ciRes.data ?? [];
-
-                const beforeIds = new Set(
-                    allCI
-                        .filter(
-                            (ci) =>
-                                ci.coordination_id === coordinationId
-                        )
-                        .map((ci) => ci.item_id)
-                );
-
-                // ③ 現在選択中
-                const afterIds = new Set(
-                    selectedItems.map((i) => i.item_id)
-                );
-
-                // ④ 差分計算
-                const toAdd = [...afterIds].filter(
-                    (id) => !beforeIds.has(id)
-                );
-                const toRemove = [...beforeIds].filter(
-                    (id) => !afterIds.has(id)
-                );
-
-                // ⑤ 中間テーブル更新
-                await Promise.all([
-                    ...toAdd.map((id) =>
-                        addItemToCoordination(coordinationId, id)
-                    ),
-                    ...toRemove.map((id) =>
-                        removeItemFromCoordination(coordinationId, id)
-                    ),
-                ]);
-
                 toast.success("コーディネートを更新しました");
                 onSubmitSuccess?.();
                 navigate("/coordination-list");
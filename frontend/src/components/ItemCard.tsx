@@ -43,6 +43,7 @@ const ItemCard: React.FC<ItemCardProps> = ({
             <div className="w-full mb-2">
                 <ItemImage
                     itemId={item.item_id}
+                    src={item.thumbnail_url}
                     alt={item.name}
                     className={`w-full rounded-xl object-cover ${compact ? "h-24" : "h-36"}`}
                 />
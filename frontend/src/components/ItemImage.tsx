@@ -3,14 +3,19 @@ import { useSignedImageUrl } from "../hooks/useSignedImageUrl";
 
 export function ItemImage({
     itemId,
+    src,
     alt = "item",
     className = "",
 }: {
     itemId: number;
+    // 署名済み URL が分かっている場合は個別取得しない
+    src?: string | null;
     alt?: string;
     className?: string;
 }) {
-    const { url, loading } = useSignedImageUrl(itemId);
+    const signed = useSignedImageUrl(src === undefined ? itemId : null);
+    const url = src === undefined ? signed.url : src;
+    const loading = src === undefined && signed.loading;
 
     return (
         <div
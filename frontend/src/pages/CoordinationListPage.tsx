@@ -4,9 +4,7 @@ import { useNavigate } from "react-router-dom";
 import { useLocation } from "react-router-dom";
 import toast from "react-hot-toast";
 
-import { getAllCoordinationItems } from "../api/coordination_items";
-import { getCoordinations } from "../api/coordinations";
-import { getItems } from "../api/items";
+import { getCoordinationsWithItems } from "../api/coordinations";
 
 import { Button } from "../components/ui/Button";
 import Card from "../components/ui/Card";
@@ -16,14 +14,11 @@ import Filter from "../components/Filter";
 import Header from "../components/Header";
 import ItemCard from "../components/ItemCard";
 
-import type { Item, MultiFilters, Coordination, CoordinationItem } from "../types";
+import type { Item, MultiFilters, Coordination } from "../types";
 import { COLOR_OPTIONS, MATERIAL_OPTIONS, PATTERN_OPTIONS, } from "../types";
 
 export default function CoordinationListPage() {
     const [coordinations, setCoordinations] = useState<Coordination[]>([]);
-    const [coordinationItems, setCoordinationItems] = useState<(
-        CoordinationItem & { item?: Item }
-    )[]>([]);
     const [selected, setSelected] = useState<Coordination | null>(null);
 
     const [filters, setFilters] = useState<MultiFilters>({
@@ -51,27 +46,20 @@ export default function CoordinationListPage() {
         setError(null);
 
         try {
-            const [coordinationRes, ciRes, itemsRes] = await Promise.all([
-                getCoordinations(),
-                getAllCoordinationItems(),
-                getItems(),
-            ]);
-
-            const coordinations = coordinationRes?.data ?? [];
-            const ciListRaw: CoordinationItem[] = ciRes?.data ?? [];
-            const items: Item[] = itemsRes ?? [];
-
-            const itemsMap = new Map<number, Item>();
-            items.forEach(item => itemsMap.set(item.item_id, item));
-
-            const ciList = ciListRaw.map(ci => ({
-                ...ci,
-                item: itemsMap.get(ci.item_id),
-            }));
-
-            // ★ ここでまとめて state 更新
-            setCoordinations(coordinations);
-            setCoordinationItems(ciList);
+            // アイテム・サムネイル URL 込みで取得（通常は 1 ページで収まる）
+            const list: Coordination[] = [];
+            let cursor: string | null = null;
+            do {
+                const res = await getCoordinationsWithItems({
+                    limit: 200,
+                    cursor,
+                    thumbnails: true,
+                });
+                list.push(...(res?.data ?? []));
+                cursor = res?.next_cursor ?? null;
+            } while (cursor);
+
+            setCoordinations(list);
         } catch (e) {
             console.error(e);
             setError("コーディネート一覧の取得に失敗しました");
@@ -106,10 +94,9 @@ export default function CoordinationListPage() {
     // コーデごとのアイテム取得
     // =========================
     const getItemsForCoordination = (coordination_id: number): Item[] => {
-        return coordinationItems
-            .filter(ci => ci.coordination_id === coordination_id)
-            .map(ci => ci.item)
-            .filter(Boolean) as Item[];
+        return coordinations.find(
+            c => c.coordination_id === coordination_id
+        )?.items ?? [];
     };
 
     // =========================
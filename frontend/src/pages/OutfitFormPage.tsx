@@ -5,6 +5,7 @@ import toast from "react-hot-toast";
 
 import { supabase } from "../lib/supabaseClient";
 import { getItems } from "../api/items";
+import { replaceUsageForDate } from "../api/usage_history";
 
 import { Button } from "../components/ui/Button";
 import Card from "../components/ui/Card";
@@ -259,19 +260,10 @@ export default function OutfitFormPage() {
         if (selectedItems.length === 0) return toast("アイテムを選択してください");
 
         try {
-            await supabase.from("usage_history").delete().eq("used_date", date);
-
-            const inserts = selectedItems.map((item) => ({
-                item_id: item.item_id,
-                used_date: date,
-            }));
-
-            const { error } = await supabase.from("usage_history").insert(inserts);
-            if (error) toast("保存に失敗しました");
-            else {
-                toast("服装を登録しました");
-                navigate("/dashboard");
-            }
+            // backend 経由で置き換える（断捨離候補などのキャッシュを破棄するため）
+            await replaceUsageForDate(date, selectedItems.map((item) => item.item_id));
+            toast("服装を登録しました");
+            navigate("/dashboard");
         } catch (err) {
             console.error(err);
             toast("保存中にエラーが発生しました");
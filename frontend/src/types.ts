@@ -16,6 +16,8 @@ export interface Item {
     };
 
     image_url?: string;
+    // 一覧 API が署名済みのサムネイルを付けて返す場合
+    thumbnail_url?: string | null;
 
     season_tag: string[];
     tpo_tags: string[];
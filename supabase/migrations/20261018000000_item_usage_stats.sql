@@ -0,0 +1,225 @@
+-- ============================================================
+-- item_usage_stats: アイテムごとの着用統計（usage_history から差分更新）
+--
+-- item_usage_summary ビューは参照のたびに usage_history 全体を集計するので、
+-- 集計結果をテーブルに持ち、usage_history の INSERT / UPDATE / DELETE で
+-- 該当アイテムの行だけを更新する。
+-- ============================================================
+
+create table if not exists public.item_usage_stats (
+    item_id         bigint primary key references public.items (item_id) on delete cascade,
+    user_id         uuid not null,
+    usage_count     integer not null default 0,
+    first_used_date date,
+    last_used_date  date,
+    -- {"2025-01": 3, "2025-02": 1}
+    monthly_counts  jsonb not null default '{}'::jsonb,
+    updated_at      timestamptz not null default now()
+);
+
+create index if not exists item_usage_stats_user_id_idx
+    on public.item_usage_stats (user_id);
+
+-- 本人の行だけ読める（書き込みはトリガー / rebuild のみ）
+alter table public.item_usage_stats enable row level security;
+
+drop policy if exists "item_usage_stats_select_own" on public.item_usage_stats;
+
+create policy "item_usage_stats_select_own"
+    on public.item_usage_stats
+    for select
+    to authenticated
+    using (user_id = auth.uid());
+
+-- 削除時の first / last 再計算用
+create index if not exists usage_history_item_id_used_date_idx
+    on public.usage_history (item_id, used_date);
+
+
+-- ------------------------------------------------------------
+-- 1 件分の差分を反映（p_delta = 1: 追加 / -1: 削除）
+-- ------------------------------------------------------------
+create or replace function public.apply_item_usage_delta(
+    p_item_id   bigint,
+    p_used_date date,
+    p_delta     integer
+)
+returns void
+language plpgsql
+set search_path = public
+as $$
+declare
+    v_month text := to_char(p_used_date, 'YYYY-MM');
+begin
+    if p_delta > 0 then
+        insert into public.item_usage_stats as s
+            (item_id, user_id, usage_count, first_used_date, last_used_date, monthly_counts)
+        select
+            i.item_id,
+            i.user_id,
+            1,
+            p_used_date,
+            p_used_date,
+            case when v_month is null then '{}'::jsonb
+                 else jsonb_build_object(v_month, 1) end
+        from public.items i
+        where i.item_id = p_item_id
+        on conflict (item_id) do update set
+            usage_count     = s.usage_count + 1,
+            first_used_date = least(s.first_used_date, excluded.first_used_date),
+            last_used_date  = greatest(s.last_used_date, excluded.last_used_date),
+            monthly_counts  = case
+                when v_month is null then s.monthly_counts
+                else jsonb_set(
+                    s.monthly_counts,
+                    array[v_month],
+                    to_jsonb(coalesce((s.monthly_counts ->> v_month)::integer, 0) + 1)
+                )
+            end,
+            updated_at      = now();
+    else
+        -- AFTER トリガーから呼ばれるので、削除済みの行は min / max に含まれない
+        update public.item_usage_stats s set
+            usage_count     = greatest(s.usage_count - 1, 0),
+            first_used_date = case
+                when p_used_date is not distinct from s.first_used_date then (
+                    select min(u.used_date) from public.usage_history u
+                    where u.item_id = p_item_id
+                )
+                else s.first_used_date
+            end,
+            last_used_date  = case
+                when p_used_date is not distinct from s.last_used_date then (
+                    select max(u.used_date) from public.usage_history u
+                    where u.item_id = p_item_id
+                )
+                else s.last_used_date
+            end,
+            monthly_counts  = case
+                when v_month is null then s.monthly_counts
+                when coalesce((s.monthly_counts ->> v_month)::integer, 0) <= 1
+                    then s.monthly_counts - v_month
+                else jsonb_set(
+                    s.monthly_counts,
+                    array[v_month],
+                    to_jsonb((s.monthly_counts ->> v_month)::integer - 1)
+                )
+            end,
+            updated_at      = now()
+        where s.item_id = p_item_id;
+    end if;
+end;
+$$;
+
+
+-- ------------------------------------------------------------
+-- usage_history の変更を item_usage_stats に反映するトリガー
+-- （backend を経由しない supabase-js からの書き込みも対象）
+-- ------------------------------------------------------------
+-- 書き込んだユーザーの権限では item_usage_stats を更新できない（RLS）ので
+-- 所有者権限で実行する
+create or replace function public.usage_history_stats_trigger()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform public.apply_item_usage_delta(old.item_id, old.used_date, -1);
+    end if;
+
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform public.apply_item_usage_delta(new.item_id, new.used_date, 1);
+    end if;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists usage_history_stats on public.usage_history;
+
+create trigger usage_history_stats
+    after insert or delete or update of item_id, used_date
+    on public.usage_history
+    for each row
+    execute function public.usage_history_stats_trigger();
+
+
+-- ------------------------------------------------------------
+-- 全件（または 1 ユーザー分）を作り直す（初回投入・不整合の修復用）
+-- python manage.py rebuild_usage_stats から呼ぶ
+-- ------------------------------------------------------------
+create or replace function public.rebuild_item_usage_stats(p_user_id uuid default null)
+returns integer
+language plpgsql
+set search_path = public
+as $$
+declare
+    v_count integer;
+begin
+    delete from public.item_usage_stats
+    where p_user_id is null or user_id = p_user_id;
+
+    with target as (
+        select u.item_id, u.used_date, i.user_id
+        from public.usage_history u
+        join public.items i on i.item_id = u.item_id
+        where p_user_id is null or i.user_id = p_user_id
+    ),
+    monthly as (
+        select item_id, to_char(used_date, 'YYYY-MM') as month, count(*) as cnt
+        from target
+        where used_date is not null
+        group by item_id, month
+    ),
+    totals as (
+        select
+            item_id,
+            user_id,
+            count(*)       as cnt,
+            min(used_date) as first_used_date,
+            max(used_date) as last_used_date
+        from target
+        group by item_id, user_id
+    )
+    insert into public.item_usage_stats
+        (item_id, user_id, usage_count, first_used_date, last_used_date, monthly_counts)
+    select
+        t.item_id,
+        t.user_id,
+        t.cnt,
+        t.first_used_date,
+        t.last_used_date,
+        coalesce(
+            (select jsonb_object_agg(m.month, m.cnt) from monthly m where m.item_id = t.item_id),
+            '{}'::jsonb
+        )
+    from totals t;
+
+    get diagnostics v_count = row_count;
+    return v_count;
+end;
+$$;
+
+
+-- ------------------------------------------------------------
+-- 権限: 統計の書き換えは API から直接呼ばせない（service_role とトリガーのみ）
+-- ------------------------------------------------------------
+revoke execute on function public.apply_item_usage_delta(bigint, date, integer)
+    from public, anon, authenticated;
+revoke execute on function public.rebuild_item_usage_stats(uuid)
+    from public, anon, authenticated;
+revoke execute on function public.usage_history_stats_trigger()
+    from public, anon, authenticated;
+
+grant execute on function public.apply_item_usage_delta(bigint, date, integer)
+    to service_role;
+grant execute on function public.rebuild_item_usage_stats(uuid)
+    to service_role;
+
+
+-- ------------------------------------------------------------
+-- 既存の usage_history から初回投入
+-- ------------------------------------------------------------
+select public.rebuild_item_usage_stats();
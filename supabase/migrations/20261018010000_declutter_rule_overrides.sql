@@ -0,0 +1,45 @@
+-- ============================================================
+-- declutter_rule_overrides: 断捨離スコアのルール表（ユーザー別の上書き）
+--
+-- 既定のルール表は backend/api/declutter_rules.py にあり、
+-- ここには差分（しきい値・点数・tier の下限）だけを保存する。
+-- ============================================================
+
+create table if not exists public.declutter_rule_overrides (
+    user_id    uuid primary key references auth.users (id) on delete cascade,
+    overrides  jsonb not null default '{}'::jsonb,
+    updated_at timestamptz not null default now()
+);
+
+-- 本人の行だけ読み書きできる
+alter table public.declutter_rule_overrides enable row level security;
+
+drop policy if exists "declutter_rule_overrides_select_own" on public.declutter_rule_overrides;
+drop policy if exists "declutter_rule_overrides_insert_own" on public.declutter_rule_overrides;
+drop policy if exists "declutter_rule_overrides_update_own" on public.declutter_rule_overrides;
+drop policy if exists "declutter_rule_overrides_delete_own" on public.declutter_rule_overrides;
+
+create policy "declutter_rule_overrides_select_own"
+    on public.declutter_rule_overrides
+    for select
+    to authenticated
+    using (user_id = auth.uid());
+
+create policy "declutter_rule_overrides_insert_own"
+    on public.declutter_rule_overrides
+    for insert
+    to authenticated
+    with check (user_id = auth.uid());
+
+create policy "declutter_rule_overrides_update_own"
+    on public.declutter_rule_overrides
+    for update
+    to authenticated
+    using (user_id = auth.uid())
+    with check (user_id = auth.uid());
+
+create policy "declutter_rule_overrides_delete_own"
+    on public.declutter_rule_overrides
+    for delete
+    to authenticated
+    using (user_id = auth.uid());
@@ -0,0 +1,180 @@
+-- ============================================================
+-- declutter_candidate_rows: 断捨離候補の絞り込みを DB 側で行う
+--
+-- declutter_suggestion_rows（items + item_usage_stats・クールダウン処理済み）から
+-- お気に入りを除き、ルール表（p_rules）で採点して
+-- tier に届く行だけを score 降順で返す。
+-- p_rules は backend/api/declutter_rules.py のルール表（ユーザー別上書き適用後）。
+-- 理由（score_breakdown）の組み立ては backend 側で行う。
+--
+-- 使用履歴は item_usage_stats（トリガーで差分更新）から読むので、
+-- item_usage_summary_for_suggestion と違い履歴の量によらず同じコストで済む。
+-- ============================================================
+
+-- 旧シグネチャ（p_cooldown_days なし）
+drop function if exists public.declutter_candidate_rows(uuid, text, jsonb, integer, integer);
+
+
+-- ------------------------------------------------------------
+-- 候補の元になる行（what-if でもそのまま使う）
+--   - 削除済み・処分予定（discard）は除く
+--   - 保留（pending）にしてから p_cooldown_days 日以内は除く（クールダウン）
+--   - 登録から p_min_age 日未満は除く
+--   monthly_usage_rate = 着用回数 / 登録からの月数（1 ヶ月未満は 1 ヶ月）
+-- ------------------------------------------------------------
+create or replace function public.declutter_suggestion_rows(
+    p_user_id       uuid,
+    p_min_age       integer default 90,
+    p_cooldown_days integer default 30
+)
+returns table (
+    item_id             bigint,
+    name                text,
+    category            text,
+    is_favorite         boolean,
+    season_tag          jsonb,
+    usage_count         bigint,
+    last_used_date      date,
+    days_since_created  integer,
+    days_since_last_use integer,
+    monthly_usage_rate  numeric
+)
+language sql
+stable
+set search_path = public
+as $$
+    select
+        i.item_id::bigint,
+        i.name::text,
+        i.category::text,
+        coalesce(i.is_favorite, false),
+        to_jsonb(i.season_tag),
+        coalesce(s.usage_count, 0)::bigint,
+        s.last_used_date,
+        (current_date - i.created_at::date)::integer,
+        (current_date - s.last_used_date)::integer,
+        round(
+            coalesce(s.usage_count, 0)::numeric
+            / greatest((current_date - i.created_at::date)::numeric / 30, 1),
+            2
+        )
+    from public.items i
+    left join public.item_usage_stats s on s.item_id = i.item_id
+    where i.user_id = p_user_id
+      and coalesce(i.status, 'active') not in ('deleted', 'discard')
+      and not (
+          i.status = 'pending'
+          and i.status_updated_at > now() - make_interval(days => p_cooldown_days)
+      )
+      and current_date - i.created_at::date >= p_min_age;
+$$;
+
+-- bands を上から評価し、最初に当たった point（当たらなければ 0）
+create or replace function public.declutter_band_point(
+    p_value numeric,
+    p_bands jsonb,
+    p_op    text
+)
+returns numeric
+language sql
+immutable
+as $$
+    select coalesce((
+        select (b.band ->> 'point')::numeric
+        from jsonb_array_elements(coalesce(p_bands, '[]'::jsonb))
+            with ordinality as b(band, ord)
+        where case p_op
+            when 'gte' then p_value >= (b.band ->> 'threshold')::numeric
+            when 'lt'  then p_value <  (b.band ->> 'threshold')::numeric
+            else false
+        end
+        order by b.ord
+        limit 1
+    ), 0);
+$$;
+
+
+create or replace function public.declutter_candidate_rows(
+    p_user_id uuid,
+    p_season  text,
+    p_rules   jsonb,
+    p_min_age integer default 90,
+    p_limit   integer default null,
+    p_cooldown_days integer default 30
+)
+returns table (
+    item_id             bigint,
+    name                text,
+    category            text,
+    is_favorite         boolean,
+    season_tag          jsonb,
+    usage_count         bigint,
+    last_used_date      date,
+    days_since_created  integer,
+    days_since_last_use integer,
+    monthly_usage_rate  numeric,
+    declutter_score     numeric
+)
+language sql
+stable
+as $$
+    with rules as (
+        select
+            max(g.grp::text) filter (where g.grp ->> 'name' = 'age')::jsonb        as age,
+            max(g.grp::text) filter (where g.grp ->> 'name' = 'last_use')::jsonb   as last_use,
+            max(g.grp::text) filter (where g.grp ->> 'name' = 'usage_rate')::jsonb as usage_rate,
+            max(g.grp::text) filter (where g.grp ->> 'name' = 'season')::jsonb     as season,
+            (
+                select min((t.tier ->> 'min_score')::numeric)
+                from jsonb_array_elements(p_rules -> 'tiers') as t(tier)
+            ) as min_score
+        from jsonb_array_elements(p_rules -> 'groups') as g(grp)
+    ),
+    scored as (
+        select
+            v.*,
+            public.declutter_band_point(v.days_since_created, r.age -> 'bands', 'gte')
+            + case
+                when v.last_used_date is null
+                    then coalesce((r.last_use -> 'null_band' ->> 'point')::numeric, 0)
+                else public.declutter_band_point(v.days_since_last_use, r.last_use -> 'bands', 'gte')
+              end
+            + public.declutter_band_point(v.monthly_usage_rate, r.usage_rate -> 'bands', 'lt')
+            + case
+                when jsonb_array_length(coalesce(v.season_tag, '[]'::jsonb)) > 0
+                     and not (coalesce(v.season_tag, '[]'::jsonb) ? p_season)
+                    then coalesce((r.season -> 'bands' -> 0 ->> 'point')::numeric, 0)
+                else 0
+              end as declutter_score,
+            r.min_score
+        from public.declutter_suggestion_rows(p_user_id, p_min_age, p_cooldown_days) v
+        cross join rules r
+        where not v.is_favorite
+    )
+    select
+        s.item_id, s.name, s.category, s.is_favorite, s.season_tag,
+        s.usage_count, s.last_used_date, s.days_since_created,
+        s.days_since_last_use, s.monthly_usage_rate, s.declutter_score
+    from scored s
+    where s.declutter_score >= s.min_score
+    order by s.declutter_score desc, s.item_id
+    limit p_limit;
+$$;
+
+
+-- ------------------------------------------------------------
+-- 権限: p_user_id を任意に渡せるので API から直接呼ばせない（backend の service_role のみ）
+-- ------------------------------------------------------------
+revoke execute on function public.declutter_candidate_rows(uuid, text, jsonb, integer, integer, integer)
+    from public, anon, authenticated;
+revoke execute on function public.declutter_suggestion_rows(uuid, integer, integer)
+    from public, anon, authenticated;
+revoke execute on function public.declutter_band_point(numeric, jsonb, text)
+    from public, anon, authenticated;
+
+grant execute on function public.declutter_candidate_rows(uuid, text, jsonb, integer, integer, integer)
+    to service_role;
+grant execute on function public.declutter_suggestion_rows(uuid, integer, integer)
+    to service_role;
+grant execute on function public.declutter_band_point(numeric, jsonb, text)
+    to service_role;
@@ -0,0 +1,125 @@
+-- ============================================================
+-- save_coordination: コーデ本体と coordination_items を 1 トランザクションで保存
+--
+-- 重複（同じアイテム構成）は読んでから確かめるのではなく
+-- (user_id, item_signature) の一意制約で弾く（23505 unique_violation）。
+-- 以前の「確認してから insert」は競合で重複を作り得たので、
+-- 一意制約を張る前に重複を 1 件（coordination_id が最小のもの）にまとめる。
+-- ============================================================
+
+-- 残す 1 件 ← 消す重複
+create temporary table coordination_duplicates as
+select
+    c.coordination_id,
+    min(c.coordination_id) over (partition by c.user_id, c.item_signature) as keep_id,
+    c.is_favorite
+from public.coordinations c
+where c.item_signature is not null;
+
+do $$
+declare
+    v_count integer;
+begin
+    select count(*) into v_count
+    from coordination_duplicates
+    where coordination_id <> keep_id;
+
+    if v_count > 0 then
+        raise notice 'save_coordination: % duplicate coordinations merged', v_count;
+    end if;
+end;
+$$;
+
+-- どれかがお気に入りなら残す 1 件をお気に入りに
+update public.coordinations c set is_favorite = true
+where c.coordination_id in (
+    select d.keep_id from coordination_duplicates d
+    group by d.keep_id
+    having bool_or(coalesce(d.is_favorite, false))
+)
+and not coalesce(c.is_favorite, false);
+
+-- 同じアイテム構成なので coordination_items は残す側のものだけでよい
+delete from public.coordination_items ci
+using coordination_duplicates d
+where ci.coordination_id = d.coordination_id
+  and d.coordination_id <> d.keep_id;
+
+delete from public.coordinations c
+using coordination_duplicates d
+where c.coordination_id = d.coordination_id
+  and d.coordination_id <> d.keep_id;
+
+drop table coordination_duplicates;
+
+create unique index if not exists coordinations_user_id_item_signature_key
+    on public.coordinations (user_id, item_signature);
+
+
+-- p_coordination_id が null なら新規作成、あれば更新
+-- 戻り値は coordination_id
+--   P0002 no_data_found        : 更新対象が無い（他人のコーデ含む）
+--   23503 foreign_key_violation: 自分のアイテムでない item_id が含まれる
+create or replace function public.save_coordination(
+    p_user_id          uuid,
+    p_coordination_id  bigint,
+    p_name             text,
+    p_is_favorite      boolean,
+    p_item_ids         bigint[],
+    p_item_signature   text
+)
+returns bigint
+language plpgsql
+as $$
+declare
+    v_id     bigint;
+    v_linked integer;
+begin
+    if p_coordination_id is null then
+        insert into public.coordinations (user_id, name, is_favorite, item_signature)
+        values (p_user_id, p_name, coalesce(p_is_favorite, false), p_item_signature)
+        returning coordination_id into v_id;
+    else
+        update public.coordinations set
+            name           = coalesce(p_name, name),
+            is_favorite    = coalesce(p_is_favorite, is_favorite),
+            item_signature = p_item_signature
+        where coordination_id = p_coordination_id
+          and user_id = p_user_id
+        returning coordination_id into v_id;
+
+        if v_id is null then
+            raise exception 'coordination % not found', p_coordination_id
+                using errcode = 'no_data_found';
+        end if;
+
+        delete from public.coordination_items
+        where coordination_id = v_id;
+    end if;
+
+    insert into public.coordination_items (coordination_id, item_id)
+    select v_id, i.item_id
+    from public.items i
+    where i.item_id = any (p_item_ids)
+      and i.user_id = p_user_id;
+
+    get diagnostics v_linked = row_count;
+    if v_linked <> (select count(distinct x) from unnest(p_item_ids) as x) then
+        raise exception 'items not found'
+            using errcode = 'foreign_key_violation';
+    end if;
+
+    return v_id;
+end;
+$$;
+
+
+-- ------------------------------------------------------------
+-- 権限: p_user_id を任意に渡せるので API から直接呼ばせない（backend の service_role のみ）
+-- create or replace（*_save_coordination_diff.sql）でも権限は引き継がれる
+-- ------------------------------------------------------------
+revoke execute on function public.save_coordination(uuid, bigint, text, boolean, bigint[], text)
+    from public, anon, authenticated;
+
+grant execute on function public.save_coordination(uuid, bigint, text, boolean, bigint[], text)
+    to service_role;
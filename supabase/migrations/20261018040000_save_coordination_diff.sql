@@ -0,0 +1,93 @@
+-- ============================================================
+-- save_coordination: coordination_items を差分で更新する
+--
+-- 更新時は全削除→全挿入ではなく、保存済みと送られてきた item_id の
+-- 差集合だけを delete / insert する。item_signature が変わらなければ
+-- coordination_items には触らない（本体も値が同じなら更新しない）。
+-- ============================================================
+
+create or replace function public.save_coordination(
+    p_user_id          uuid,
+    p_coordination_id  bigint,
+    p_name             text,
+    p_is_favorite      boolean,
+    p_item_ids         bigint[],
+    p_item_signature   text
+)
+returns bigint
+language plpgsql
+as $$
+declare
+    v_id            bigint;
+    v_old_signature text;
+    v_to_add        bigint[];
+    v_linked        integer;
+begin
+    if p_coordination_id is null then
+        insert into public.coordinations (user_id, name, is_favorite, item_signature)
+        values (p_user_id, p_name, coalesce(p_is_favorite, false), p_item_signature)
+        returning coordination_id into v_id;
+
+        v_to_add := p_item_ids;
+    else
+        select coordination_id, item_signature
+        into v_id, v_old_signature
+        from public.coordinations
+        where coordination_id = p_coordination_id
+          and user_id = p_user_id
+        for update;
+
+        if v_id is null then
+            raise exception 'coordination % not found', p_coordination_id
+                using errcode = 'no_data_found';
+        end if;
+
+        update public.coordinations set
+            name           = coalesce(p_name, name),
+            is_favorite    = coalesce(p_is_favorite, is_favorite),
+            item_signature = p_item_signature
+        where coordination_id = v_id
+          and (
+              name is distinct from coalesce(p_name, name)
+              or is_favorite is distinct from coalesce(p_is_favorite, is_favorite)
+              or item_signature is distinct from p_item_signature
+          );
+
+        -- アイテム構成が同じなら中間テーブルは触らない
+        if v_old_signature is not distinct from p_item_signature then
+            return v_id;
+        end if;
+
+        delete from public.coordination_items
+        where coordination_id = v_id
+          and item_id <> all (p_item_ids);
+
+        select coalesce(array_agg(x), '{}')
+        into v_to_add
+        from unnest(p_item_ids) as x
+        where not exists (
+            select 1 from public.coordination_items ci
+            where ci.coordination_id = v_id
+              and ci.item_id = x
+        );
+    end if;
+
+    if cardinality(v_to_add) = 0 then
+        return v_id;
+    end if;
+
+    insert into public.coordination_items (coordination_id, item_id)
+    select v_id, i.item_id
+    from public.items i
+    where i.item_id = any (v_to_add)
+      and i.user_id = p_user_id;
+
+    get diagnostics v_linked = row_count;
+    if v_linked <> (select count(distinct x) from unnest(v_to_add) as x) then
+        raise exception 'items not found'
+            using errcode = 'foreign_key_violation';
+    end if;
+
+    return v_id;
+end;
+$$;
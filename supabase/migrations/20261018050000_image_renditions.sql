@@ -0,0 +1,63 @@
+-- ============================================================
+-- image_renditions: 元画像ごとのリサイズ版（thumb / card / full）の状態
+--
+-- 直接アップロードされた画像のリサイズ版は web の worker では作らず、
+-- ここに pending で積んでおき、別プロセス（python manage.py process_renditions）が作る。
+-- 署名時は ready の画像だけリサイズ版を署名し、それ以外は元画像を署名する。
+--
+-- status:
+--   pending   作成待ち
+--   building  作成中（worker が取得済み。p_stale_seconds を過ぎたら取り直す）
+--   ready     リサイズ版あり
+--   failed    作れなかった（画像として開けない・試行回数超過）→ 元画像で表示
+-- ============================================================
+
+create table if not exists public.image_renditions (
+    file_path  text primary key,
+    status     text not null default 'pending'
+               check (status in ('pending', 'building', 'ready', 'failed')),
+    attempts   integer not null default 0,
+    last_error text,
+    updated_at timestamptz not null default now()
+);
+
+create index if not exists image_renditions_status_updated_at_idx
+    on public.image_renditions (status, updated_at);
+
+-- backend（service_role）からのみ読み書きする（ポリシーは作らない）
+alter table public.image_renditions enable row level security;
+
+
+-- ------------------------------------------------------------
+-- 作成待ちのジョブを取得して building にする（複数 worker でも重複しない）
+-- ------------------------------------------------------------
+create or replace function public.claim_rendition_jobs(
+    p_limit         integer default 10,
+    p_stale_seconds integer default 600
+)
+returns setof public.image_renditions
+language sql
+set search_path = public
+as $$
+    update public.image_renditions r set
+        status     = 'building',
+        attempts   = r.attempts + 1,
+        updated_at = now()
+    where r.file_path in (
+        select j.file_path
+        from public.image_renditions j
+        where j.status = 'pending'
+           or (j.status = 'building'
+               and j.updated_at < now() - make_interval(secs => p_stale_seconds))
+        order by j.updated_at
+        limit p_limit
+        for update skip locked
+    )
+    returning r.*;
+$$;
+
+revoke execute on function public.claim_rendition_jobs(integer, integer)
+    from public, anon, authenticated;
+
+grant execute on function public.claim_rendition_jobs(integer, integer)
+    to service_role;